@@ -1,8 +1,8 @@
 #!/bin/bash
 # Build script for StreamFlix Kodi Skin
 
-VERSION="1.0.6"
 SKIN_NAME="skin.streamflix"
+VERSION=$(sed -n 's/.*<addon id="'"${SKIN_NAME}"'" version="\([^"]*\)".*/\1/p' "$(dirname "$0")/addon.xml")
 
 # Navigate to parent directory
 cd "$(dirname "$0")/.."
@@ -10,17 +10,11 @@ cd "$(dirname "$0")/.."
 # Create build directory
 mkdir -p build
 
-# Create zip file (excluding build artifacts and git files)
-# Create both versioned and non-versioned zips
-zip -r "build/${SKIN_NAME}-${VERSION}.zip" "${SKIN_NAME}" \
-    -x "*.git*" \
-    -x "*build.sh" \
-    -x "*__pycache__*" \
-    -x "*.DS_Store" \
-    -x "*repository/*"
-
-# Copy to non-versioned name for "latest" URL
-cp "build/${SKIN_NAME}-${VERSION}.zip" "build/${SKIN_NAME}.zip"
+# Build the skin zip: packs media/ into Textures.xbt and checks every
+# texture the XML references is packaged. Creates both versioned and
+# non-versioned (for the "latest" URL) zips. Extra arguments such as
+# --compress or --benchmark are passed through.
+python3 "${SKIN_NAME}/scripts/build_skin.py" --output build "$@" || exit 1
 
 # Create repository addon zip
 zip -r "build/repository.streamflix-${VERSION}.zip" "repository.streamflix" \
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Asset scanning and optimisation for StreamFlix builds
+Finds the textures and fonts the skin XML uses, collapses duplicate media,
+drops unused assets and losslessly recompresses PNGs in a staged skin tree.
+"""
+
+import hashlib
+import re
+import struct
+import zlib
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import xbt
+
+TEXTURE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif'}
+FONT_EXTENSIONS = {'.ttf', '.otf'}
+
+# Kodi only loads skin fonts from special://skin/fonts/
+FONT_DIR = 'fonts'
+
+TEXTURE_PATH_PATTERN = re.compile(r'^[\w./-]+\.(?:png|jpe?g|gif)$', re.IGNORECASE)
+
+# PNG chunks that affect how pixels are displayed; everything else is metadata
+PNG_KEEP_CHUNKS = {b'IHDR', b'PLTE', b'tRNS', b'gAMA', b'cHRM', b'sRGB', b'iCCP', b'IDAT', b'IEND'}
+
+
+class AssetError(Exception):
+    pass
+
+
+class OptimizeReport:
+    def __init__(self):
+        self.duplicates = {}  # removed path -> canonical path
+        self.duplicate_fonts = {}
+        self.removed_textures = []
+        self.removed_fonts = []
+        self.recompressed = []
+        self.bytes_saved = {'duplicates': 0, 'font_duplicates': 0, 'textures': 0, 'fonts': 0, 'png': 0}
+
+    @property
+    def total_saved(self):
+        return sum(self.bytes_saved.values())
+
+
+def is_static_texture(value):
+    """Whether a tag/attribute value is a plain texture path inside media/."""
+    value = value.strip()
+    if not value or '$' in value or '://' in value or value.startswith('/'):
+        return False
+    return bool(TEXTURE_PATH_PATTERN.match(value))
+
+
+def collect_texture_references(xml_dir):
+    """Find every static texture the skin XML references.
+
+    Returns {normalised path: set of XML file names}.
+    """
+    references = {}
+
+    for xml_file in sorted(Path(xml_dir).glob('*.xml')):
+        try:
+            root = ET.parse(xml_file).getroot()
+        except ET.ParseError as e:
+            print(f"⚠️  Skipping {xml_file.name}: {e}")
+            continue
+
+        for element in root.iter():
+            values = list(element.attrib.values())
+            if element.text:
+                values.append(element.text)
+            for value in values:
+                if is_static_texture(value):
+                    name = xbt.normalize_texture_path(value.strip())
+                    references.setdefault(name, set()).add(xml_file.name)
+
+    return references
+
+
+def collect_font_references(xml_dir):
+    """Return the lower-cased font file names used by Font.xml, or None if there is no Font.xml."""
+    font_xml = Path(xml_dir) / 'Font.xml'
+    if not font_xml.exists():
+        return None
+
+    root = ET.parse(font_xml).getroot()
+    return {
+        element.text.strip().lower()
+        for element in root.iter('filename')
+        if element.text and element.text.strip()
+    }
+
+
+def find_media_files(media_dir):
+    """Map normalised media paths to files on disk."""
+    media = {}
+    for path in sorted(Path(media_dir).rglob('*')):
+        if path.is_file() and path.suffix.lower() in TEXTURE_EXTENSIONS:
+            media[xbt.normalize_texture_path(path.relative_to(media_dir).as_posix())] = path
+    return media
+
+
+def rewrite_texture_reference(content, old, new):
+    """Replace whole-value references to texture old with new in XML text."""
+    pattern = re.compile(r'(>\s*|=\s*["\'])' + re.escape(old) + r'(\s*<|["\'])', re.IGNORECASE)
+    return pattern.subn(lambda m: m.group(1) + new + m.group(2), content)
+
+
+def dedupe_textures(media_dir, xml_dir, references, report):
+    """Collapse byte-identical referenced textures onto one canonical path.
+
+    The most referenced copy wins; XML pointing at the others is rewritten.
+    References are collected again from the rewritten XML, and nothing is
+    deleted if any still point at a duplicate (AssetError). Returns the
+    updated references mapping.
+    """
+    media = find_media_files(media_dir)
+    groups = {}
+    for name in references:
+        if name in media:
+            digest = hashlib.sha256(media[name].read_bytes()).hexdigest()
+            groups.setdefault(digest, []).append(name)
+
+    renames = {}
+    for names in groups.values():
+        if len(names) < 2:
+            continue
+        canonical = min(names, key=lambda n: (-len(references[n]), len(n), n))
+        for name in names:
+            if name != canonical:
+                renames[name] = canonical
+
+    if not renames:
+        return references
+
+    for xml_file in sorted(Path(xml_dir).glob('*.xml')):
+        content = xml_file.read_text(encoding='utf-8')
+        changed = 0
+        for old, new in renames.items():
+            # Write the path as it is on disk; names are lower-cased
+            new_path = media[new].relative_to(media_dir).as_posix()
+            content, count = rewrite_texture_reference(content, old, new_path)
+            changed += count
+        if changed:
+            xml_file.write_text(content, encoding='utf-8')
+
+    updated = collect_texture_references(xml_dir)
+    stale = sorted(name for name in renames if name in updated)
+    if stale:
+        raise AssetError("Could not rewrite references to duplicate texture(s): " + ", ".join(
+            f"{name} (in {', '.join(sorted(updated[name]))})" for name in stale))
+
+    for old, new in renames.items():
+        report.duplicates[old] = new
+        report.bytes_saved['duplicates'] += media[old].stat().st_size
+        media[old].unlink()
+
+    return updated
+
+
+def remove_unreferenced_textures(media_dir, references, report):
+    """Delete media files no XML references."""
+    for name, path in find_media_files(media_dir).items():
+        if name not in references:
+            report.removed_textures.append(name)
+            report.bytes_saved['textures'] += path.stat().st_size
+            path.unlink()
+    remove_empty_dirs(media_dir)
+
+
+def dedupe_fonts(skin_dir, report):
+    """Delete copies of fonts/ files elsewhere in the skin, which Kodi never reads."""
+    skin_dir = Path(skin_dir)
+    fonts_dir = skin_dir / FONT_DIR
+    if not fonts_dir.is_dir():
+        return
+
+    canonical = {}
+    for path in sorted(fonts_dir.iterdir()):
+        if path.is_file() and path.suffix.lower() in FONT_EXTENSIONS:
+            canonical.setdefault(hashlib.sha256(path.read_bytes()).hexdigest(), path)
+
+    for path in sorted(skin_dir.rglob('*')):
+        if not path.is_file() or path.suffix.lower() not in FONT_EXTENSIONS or path.parent == fonts_dir:
+            continue
+        original = canonical.get(hashlib.sha256(path.read_bytes()).hexdigest())
+        if original is not None:
+            report.duplicate_fonts[path.relative_to(skin_dir).as_posix()] = original.relative_to(skin_dir).as_posix()
+            report.bytes_saved['font_duplicates'] += path.stat().st_size
+            path.unlink()
+            parent = path.parent
+            while parent != skin_dir and not any(parent.iterdir()):
+                parent.rmdir()
+                parent = parent.parent
+
+
+def remove_unreferenced_fonts(fonts_dir, font_references, report):
+    """Delete font files Font.xml doesn't reference."""
+    if font_references is None or not Path(fonts_dir).is_dir():
+        return
+
+    for path in sorted(Path(fonts_dir).iterdir()):
+        if path.suffix.lower() in FONT_EXTENSIONS and path.name.lower() not in font_references:
+            report.removed_fonts.append(path.name)
+            report.bytes_saved['fonts'] += path.stat().st_size
+            path.unlink()
+
+
+def remove_empty_dirs(directory):
+    """Delete directories left empty under directory."""
+    for path in sorted(Path(directory).rglob('*'), key=lambda p: len(p.parts), reverse=True):
+        if path.is_dir() and not any(path.iterdir()):
+            path.rmdir()
+
+
+def _png_chunk(chunk_type, data):
+    return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', zlib.crc32(chunk_type + data))
+
+
+def recompress_png(data):
+    """Losslessly shrink a PNG.
+
+    Drops metadata chunks, merges IDAT chunks and re-deflates the image
+    data at maximum compression, trying both the original filters and
+    unfiltered scanlines. Returns the original bytes if nothing is smaller,
+    the PNG has no IEND chunk, or the result doesn't decode to the same
+    pixels.
+    """
+    if not data.startswith(xbt.PNG_SIGNATURE):
+        return data
+
+    pos = len(xbt.PNG_SIGNATURE)
+    chunks = []
+    idat = []
+    header = None
+    ended = False
+    while pos < len(data):
+        length, chunk_type = struct.unpack('>I4s', data[pos:pos + 8])
+        chunk = data[pos + 8:pos + 8 + length]
+        pos += length + 12
+        if chunk_type == b'IHDR':
+            header = struct.unpack('>IIBBBBB', chunk)
+        if chunk_type == b'IDAT':
+            idat.append(chunk)
+        elif chunk_type in PNG_KEEP_CHUNKS:
+            chunks.append((chunk_type, chunk))
+        if chunk_type == b'IEND':
+            ended = True
+            break
+
+    if header is None or not idat or not ended:
+        return data
+
+    filtered = zlib.decompress(b''.join(idat))
+    candidates = [filtered]
+
+    width, height, bit_depth, colour_type, _, _, interlace = header
+    bpp = xbt.PNG_CHANNELS.get(colour_type, 0)
+    stride = width * bpp
+    if bit_depth == 8 and interlace == 0 and bpp and len(filtered) == height * (stride + 1):
+        pixels = xbt.unfilter_scanlines(filtered, width, height, bpp)
+        candidates.append(b''.join(
+            b'\0' + bytes(pixels[y * stride:(y + 1) * stride]) for y in range(height)
+        ))
+
+    best_idat = min((zlib.compress(c, 9) for c in candidates), key=len)
+
+    out = [xbt.PNG_SIGNATURE]
+    for chunk_type, chunk in chunks:
+        if chunk_type == b'IEND':
+            out.append(_png_chunk(b'IDAT', best_idat))
+        out.append(_png_chunk(chunk_type, chunk))
+
+    result = b''.join(out)
+    if len(result) >= len(data) or not _same_pixels(data, result):
+        return data
+    return result
+
+
+def _same_pixels(original, recompressed):
+    try:
+        expected = xbt.decode_png(original)
+    except xbt.XBTError:
+        # A format decode_png can't read; only its deflate stream was redone
+        return True
+    try:
+        return xbt.decode_png(recompressed) == expected
+    except xbt.XBTError:
+        return False
+
+
+def recompress_pngs(media_dir, report):
+    """Recompress every PNG under media_dir in place."""
+    for name, path in find_media_files(media_dir).items():
+        if path.suffix.lower() != '.png':
+            continue
+        data = path.read_bytes()
+        try:
+            smaller = recompress_png(data)
+        except (zlib.error, struct.error, IndexError, ValueError, xbt.XBTError) as e:
+            print(f"⚠️  {name}: not recompressed, corrupt PNG ({e})")
+            continue
+        if len(smaller) < len(data):
+            path.write_bytes(smaller)
+            report.recompressed.append(name)
+            report.bytes_saved['png'] += len(data) - len(smaller)
+
+
+def optimize_skin(skin_dir, xml_dir):
+    """Run every optimisation stage on a staged skin tree.
+
+    Returns (report, texture references after deduplication).
+    """
+    skin_dir = Path(skin_dir)
+    media_dir = skin_dir / 'media'
+    report = OptimizeReport()
+
+    references = collect_texture_references(xml_dir)
+    references = dedupe_textures(media_dir, xml_dir, references, report)
+    remove_unreferenced_textures(media_dir, references, report)
+    dedupe_fonts(skin_dir, report)
+    remove_unreferenced_fonts(skin_dir / FONT_DIR, collect_font_references(xml_dir), report)
+    recompress_pngs(media_dir, report)
+
+    return report, references
+
+
+def print_report(report):
+    """Print what the optimisation stage removed and how much it saved."""
+    print("\n🧹 Asset optimisation:")
+    for old, new in sorted(report.duplicates.items()):
+        print(f"   duplicate  {old} -> {new}")
+    print(f"   {len(report.duplicates)} duplicate texture(s): {report.bytes_saved['duplicates']:,} bytes")
+    print(f"   {len(report.duplicate_fonts)} duplicate font(s) outside {FONT_DIR}/: "
+          f"{report.bytes_saved['font_duplicates']:,} bytes")
+    print(f"   {len(report.removed_textures)} unreferenced texture(s): {report.bytes_saved['textures']:,} bytes")
+    print(f"   {len(report.removed_fonts)} unreferenced font(s): {report.bytes_saved['fonts']:,} bytes")
+    print(f"   {len(report.recompressed)} PNG(s) recompressed: {report.bytes_saved['png']:,} bytes")
+    print(f"   Total saved: {report.total_saved:,} bytes")
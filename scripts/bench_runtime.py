@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Runtime benchmarks for StreamFlix
+Runs search.py, the helper service and the keymap service against the
+simulated Kodi runtime in scripts/fake_kodi and checks keystroke latency,
+JSON-RPC traffic, threads, wakeups and startup I/O against regression
+thresholds.
+"""
+
+import argparse
+import importlib.util
+import json
+import shutil
+import statistics
+import sys
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+SKIN_DIR = SCRIPT_DIR.parent
+sys.path.insert(0, str(SCRIPT_DIR / 'fake_kodi'))
+
+import kodi_runtime  # noqa: E402
+import xbmcgui  # noqa: E402
+
+SEARCH_SCRIPT = SKIN_DIR / 'search.py'
+KEYMAP_SERVICE = SKIN_DIR / 'service.py'
+HELPER_SERVICE = SKIN_DIR / 'extras' / 'script.streamflix.helper' / 'service.py'
+
+# Kodi action ids SearchWindow.onAction understands
+ACTION_BACKSPACE = 61448
+ACTION_SPACE = 61536
+
+# The list SearchWindow shows results in
+RESULTS_LIST_ID = 50
+
+# Upper bounds; a run above any of these is a regression
+THRESHOLDS = {
+    'search.rpc_per_keystroke': 2.0,
+    'search.addon_p95_ms': 50.0,
+    'service.threads_per_focus_change': 1.0,
+    'service.wakeups_per_minute': 400.0,
+    'service.gui_queries_per_minute': 2000.0,
+    'keymap.warm_vfs_calls': 0,
+    'keymap.warm_reloads': 0,
+    'keymap.unchanged_update_reloads': 0,
+    'keymap.changed_update_reloads': 1,
+}
+
+# Home for 5s, scroll quickly through episodes, settle on one long enough
+# for a preview, then leave
+DEFAULT_FOCUS_TRACE = (
+    [[0.0, 'window', 'Home', None], [5.0, 'window', 'MyVideoNav', 'episodes']]
+    + [[5.0 + i * 0.5, 'focus', f'Episode {i + 1}', f'/media/tv/s01e{i + 1:02}.mkv'] for i in range(10)]
+    + [[30.0, 'focus', 'Episode 11', '/media/tv/s01e11.mkv'], [45.0, 'window', 'Home', None]]
+)
+
+
+def load_addon_module(name, path):
+    """Import an add-on script by path under a unique module name."""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def key_action(key):
+    """The xbmcgui.Action a keyboard key sends to SearchWindow."""
+    if key == '\b':
+        return xbmcgui.Action(ACTION_BACKSPACE)
+    if key == ' ':
+        return xbmcgui.Action(ACTION_SPACE)
+    if key.isdigit():
+        return xbmcgui.Action(61488 + int(key))
+    return xbmcgui.Action(61505 + ord(key.lower()) - ord('a'))
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def bench_search(library_size, rpc_latency, keys, key_interval=0.15, tick=0.01, settle=5.0):
+    """Type keys into SearchWindow key_interval apart and measure each keystroke.
+
+    Keys are delivered to onAction one at a time on a tracked thread, as
+    Kodi's GUI thread does, while the virtual clock runs in tick steps, so
+    debounces and worker threads in the add-on run on simulated time. A
+    keystroke's latency runs from the key press until the results list is
+    next updated: virtual time passed (JSON-RPC latency, waits) plus wall
+    time spent in add-on code meanwhile. Time the fake library spends
+    answering queries is excluded.
+    """
+    runtime = kodi_runtime.reset(library_size=library_size, rpc_latency=rpc_latency)
+    clock = runtime.clock
+    search = runtime.attach(load_addon_module('streamflix_search', SEARCH_SCRIPT))
+
+    window = search.SearchWindow('SearchWindow.xml', str(SKIN_DIR), 'Default', '1080p')
+    window.onInit()
+
+    presses = [(index * key_interval, key) for index, key in enumerate(keys)]
+    deadline = presses[-1][0] + settle
+    pending = []   # (pressed at, add-on time at press, action) not yet delivered
+    waiting = []   # (pressed at, add-on time at press) delivered, results not yet shown
+    latencies = []
+    addon_times = []
+    errors = []
+    state = {'addon_time': 0.0, 'handling': False}
+    updates = runtime.list_updates[RESULTS_LIST_ID]
+
+    def deliver(action):
+        try:
+            window.onAction(action)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            state['handling'] = False
+
+    def step(seconds, thread=None):
+        rpc_wall_before = runtime.rpc_wall_time
+        start = time.perf_counter()
+        if thread is not None:
+            thread.start()
+        clock.advance(seconds)
+        wall = time.perf_counter() - start
+        state['addon_time'] += wall - (runtime.rpc_wall_time - rpc_wall_before)
+
+    while (presses or pending or waiting) and clock.time() <= deadline:
+        while presses and presses[0][0] <= clock.time() + 1e-9:
+            pressed_at, key = presses.pop(0)
+            pending.append((pressed_at, state['addon_time'], key_action(key)))
+
+        if pending and not state['handling']:
+            pressed_at, addon_at_press, action = pending.pop(0)
+            waiting.append((pressed_at, addon_at_press))
+            state['handling'] = True
+            step(0, clock.Thread(target=deliver, args=(action,), daemon=True))
+        else:
+            step(tick)
+
+        if errors:
+            raise errors[0]
+        if runtime.list_updates[RESULTS_LIST_ID] != updates:
+            updates = runtime.list_updates[RESULTS_LIST_ID]
+            shown_at = runtime.list_updated_at[RESULTS_LIST_ID]
+            for pressed_at, addon_at_press in waiting:
+                addon_time = state['addon_time'] - addon_at_press
+                addon_times.append(addon_time * 1000)
+                latencies.append((shown_at - pressed_at + addon_time) * 1000)
+            waiting = []
+
+    runtime.abort()
+    if not latencies:
+        raise kodi_runtime.SimulationError("No keystroke ever updated the search results")
+
+    return {
+        'library_size': library_size,
+        'keystrokes': len(keys),
+        'unanswered': len(keys) - len(latencies),
+        'p50_ms': statistics.median(latencies),
+        'p95_ms': percentile(latencies, 0.95),
+        'max_ms': max(latencies),
+        'addon_p95_ms': percentile(addon_times, 0.95),
+        'rpc_per_keystroke': sum(runtime.rpc_calls.values()) / len(keys),
+        'results': len(window.results),
+    }
+
+
+def bench_service(duration, focus_trace, tick=0.05):
+    """Run the helper service for duration virtual seconds while replaying focus_trace."""
+    runtime = kodi_runtime.reset(addon_info={'id': 'script.streamflix.helper'})
+    service_module = runtime.attach(load_addon_module('streamflix_helper_service', HELPER_SERVICE))
+    clock = runtime.clock
+
+    service = service_module.StreamflixService()
+    service_thread = clock.Thread(target=service.run, daemon=True)
+    service_thread.start()
+
+    events = sorted(focus_trace, key=lambda event: event[0])
+    focus_changes = 0
+    try:
+        while clock.time() < duration:
+            while events and events[0][0] <= clock.time():
+                _, kind, first, second = events.pop(0)
+                if kind == 'window':
+                    runtime.show_window(first, second)
+                else:
+                    runtime.focus_item(first, second)
+                    focus_changes += 1
+            clock.advance(tick)
+    finally:
+        runtime.abort()
+        service_thread.join(5)
+
+    minutes = duration / 60
+    threads = clock.threads_started - 1  # The service thread itself
+    return {
+        'duration_s': duration,
+        'focus_changes': focus_changes,
+        'threads_spawned': threads,
+        'threads_per_focus_change': threads / focus_changes if focus_changes else 0.0,
+        'wakeups_per_minute': clock.wakeups / minutes,
+        'gui_queries_per_minute': sum(runtime.gui_queries.values()) / minutes,
+        'previews_started': sum(1 for cmd in runtime.builtins if cmd.startswith('PlayMedia(')),
+    }
+
+
+def bench_keymap_startup():
+    """Run the keymap service through first install, restarts and updates.
+
+    Reports xbmcvfs calls, keymap reloads and time spent per startup.
+    """
+    runtime = kodi_runtime.reset(addon_info={'id': 'skin.streamflix', 'version': '1.0.0'})
+    addon_dir = Path(runtime.root) / 'addon'
+    keymap = addon_dir / 'resources' / 'keymaps' / 'keymap.xml'
+    keymap.parent.mkdir(parents=True)
+    shutil.copyfile(SKIN_DIR / 'resources' / 'keymaps' / 'keymap.xml', keymap)
+    runtime.addon_info['path'] = str(addon_dir)
+
+    service = load_addon_module('streamflix_service', KEYMAP_SERVICE)
+
+    def startup():
+        vfs_before = sum(runtime.vfs_calls.values())
+        reloads_before = runtime.builtins.count('Action(reloadkeymaps)')
+        start = time.perf_counter()
+        service.install_keymap()
+        return {
+            'ms': (time.perf_counter() - start) * 1000,
+            'vfs_calls': sum(runtime.vfs_calls.values()) - vfs_before,
+            'reloads': runtime.builtins.count('Action(reloadkeymaps)') - reloads_before,
+        }
+
+    results = {'first': startup(), 'warm': startup()}
+
+    runtime.addon_info['version'] = '1.0.1'
+    results['unchanged_update'] = startup()
+
+    runtime.addon_info['version'] = '1.0.2'
+    keymap.write_text(keymap.read_text().replace('<escape>Stop</escape>', '<escape>Back</escape>'))
+    results['changed_update'] = startup()
+
+    installed = Path(runtime.translate_path('special://userdata/')) / 'keymaps' / service.KEYMAP_FILE
+    if installed.read_bytes() != keymap.read_bytes():
+        raise kodi_runtime.SimulationError("Updated keymap was not installed")
+
+    metrics = {}
+    for scenario, result in results.items():
+        for key, value in result.items():
+            metrics[f'{scenario}_{key}'] = value
+    return metrics
+
+
+def check_thresholds(metrics):
+    """Return the threshold names each metric exceeds."""
+    failures = []
+    for name, limit in THRESHOLDS.items():
+        if name in metrics and metrics[name] > limit:
+            failures.append(f"{name} = {metrics[name]:.2f} (limit {limit:.2f})")
+    return failures
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Benchmark StreamFlix scripts on a simulated Kodi')
+    parser.add_argument('--sizes', default='1000,10000,100000',
+                        help='Comma separated library sizes for the search benchmark')
+    parser.add_argument('--rpc-latency-ms', type=float, default=20.0,
+                        help='Latency added to every JSON-RPC call (virtual time)')
+    parser.add_argument('--keys', default='the dark\b\bk',
+                        help='Keys typed into the search window (\\b is backspace)')
+    parser.add_argument('--key-interval-ms', type=float, default=150.0,
+                        help='Virtual time between keystrokes')
+    parser.add_argument('--duration', type=float, default=60.0,
+                        help='Virtual seconds to run the helper service for')
+    parser.add_argument('--focus-trace', type=Path,
+                        help='JSON list of [time, "window", name, content] / [time, "focus", label, path]')
+    args = parser.parse_args()
+
+    keys = args.keys.replace('\\b', '\b')
+    focus_trace = json.loads(args.focus_trace.read_text()) if args.focus_trace else DEFAULT_FOCUS_TRACE
+
+    print("⏱  StreamFlix runtime benchmarks")
+    print("=" * 60)
+    failures = []
+
+    print(f"\n🔎 SearchWindow ({len(keys)} keystrokes, {args.rpc_latency_ms:.0f} ms JSON-RPC latency)")
+    for size in (int(s) for s in args.sizes.split(',')):
+        result = bench_search(size, args.rpc_latency_ms / 1000, keys, args.key_interval_ms / 1000)
+        print(f"   {size:>7,} items: p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms, "
+              f"max {result['max_ms']:.1f} ms, add-on p95 {result['addon_p95_ms']:.1f} ms, "
+              f"{result['rpc_per_keystroke']:.1f} JSON-RPC calls/keystroke")
+        if result['unanswered']:
+            print(f"   {result['unanswered']} keystroke(s) never updated the results")
+        failures.extend(f"search[{size}]: {f}" for f in check_thresholds(
+            {f'search.{key}': value for key, value in result.items()}))
+
+    print(f"\n🎞  StreamflixService ({args.duration:.0f}s virtual)")
+    result = bench_service(args.duration, focus_trace)
+    print(f"   {result['focus_changes']} focus changes, {result['threads_spawned']} thread(s) spawned "
+          f"({result['threads_per_focus_change']:.2f} per change)")
+    print(f"   {result['wakeups_per_minute']:.0f} wakeups/min, "
+          f"{result['gui_queries_per_minute']:.0f} GUI queries/min, "
+          f"{result['previews_started']} preview(s) started")
+    failures.extend(f"service: {f}" for f in check_thresholds(
+        {f'service.{key}': value for key, value in result.items()}))
+
+    print("\n⌨  Keymap service startup")
+    result = bench_keymap_startup()
+    for scenario in ('first', 'warm', 'unchanged_update', 'changed_update'):
+        print(f"   {scenario.replace('_', ' ')}: {result[f'{scenario}_ms']:.2f} ms, "
+              f"{result[f'{scenario}_vfs_calls']} xbmcvfs call(s), "
+              f"{result[f'{scenario}_reloads']} keymap reload(s)")
+    failures.extend(f"keymap: {f}" for f in check_thresholds(
+        {f'keymap.{key}': value for key, value in result.items()}))
+
+    print("\n" + "=" * 60)
+    if failures:
+        print("❌ Regressions:")
+        for failure in failures:
+            print(f"   {failure}")
+        sys.exit(1)
+    print("✅ All benchmarks within thresholds")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Build pipeline for StreamFlix
+Stages the skin, optimises its assets, optionally flattens the window XML,
+packs media/ into a Kodi Textures.xbt bundle and zips the result.
+"""
+
+import argparse
+import fnmatch
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+from pathlib import Path
+
+import assets
+import flatten_xml
+import xbt
+
+SKIN_NAME = 'skin.streamflix'
+BUNDLE_NAME = 'Textures.xbt'
+
+# Files Kodi can read from a bundle; anything else under media/ ships loose
+PACKABLE_EXTENSIONS = {'.png'}
+
+# Development files that never ship; anything git ignores is left out too
+DEV_PATHS = ('.gitignore', 'build.sh', 'scripts', 'tests')
+
+
+def read_addon_info(skin_dir):
+    """Return (version, xml folder) from addon.xml."""
+    root = ET.parse(skin_dir / 'addon.xml').getroot()
+    resolutions = list(root.iter('res'))
+    default = next((res for res in resolutions if res.get('default') == 'true'), None)
+    if default is None and resolutions:
+        default = resolutions[0]
+    folder = default.get('folder', 'xml') if default is not None else 'xml'
+    return root.get('version'), skin_dir / folder
+
+
+def pack_textures(media_dir, output, compress=False):
+    """Pack every PNG under media_dir into an XBT bundle.
+
+    Returns ({bundle name: file}, {name: file} of textures left loose).
+    Bundle names are normalised (lower case), so use the paths to reach
+    the files on disk. Textures that can't be decoded are left loose so
+    Kodi still finds them on disk.
+    """
+    textures = {}
+    packed = {}
+    loose = {}
+
+    for name, path in assets.find_media_files(media_dir).items():
+        if path.suffix.lower() not in PACKABLE_EXTENSIONS:
+            loose[name] = path
+            continue
+        try:
+            textures[name] = xbt.decode_png(path.read_bytes())
+            packed[name] = path
+        except xbt.XBTError as e:
+            print(f"⚠️  {name}: {e} - shipping as a loose file")
+            loose[name] = path
+
+    xbt.write_xbt(output, textures, compress)
+    return packed, loose
+
+
+def check_references(references, bundle_path, loose_names):
+    """Check each referenced texture is in the bundle or shipped loose."""
+    bundled = xbt.read_xbt(bundle_path) if bundle_path else {}
+    missing = []
+
+    for name, files in sorted(references.items()):
+        if name not in bundled and name not in loose_names:
+            missing.append(f"{name} (referenced in {', '.join(sorted(files))})")
+
+    return missing
+
+
+def _gitignore_patterns(skin_dir):
+    path = skin_dir / '.gitignore'
+    if not path.exists():
+        return []
+    lines = (line.strip() for line in path.read_text(encoding='utf-8').splitlines())
+    return [line for line in lines if line and not line.startswith('#')]
+
+
+def _is_ignored(relative, patterns):
+    """Approximate .gitignore matching for trees that aren't git checkouts."""
+    posix = relative.as_posix()
+    for pattern in patterns:
+        anchored = pattern.startswith('/')
+        pattern = pattern.strip('/')
+        if anchored:
+            candidates = [posix] + ['/'.join(relative.parts[:i]) for i in range(1, len(relative.parts))]
+        else:
+            candidates = list(relative.parts)
+        if any(fnmatch.fnmatch(candidate, pattern) for candidate in candidates):
+            return True
+    return False
+
+
+def list_source_files(skin_dir):
+    """Files git would track in skin_dir (tracked or untracked but not ignored).
+
+    Falls back to walking the tree with the top-level .gitignore when git
+    isn't available.
+    """
+    try:
+        output = subprocess.run(
+            ['git', 'ls-files', '-z', '--cached', '--others', '--exclude-standard'],
+            cwd=skin_dir, capture_output=True, check=True,
+        ).stdout
+        files = {Path(name) for name in output.decode('utf-8').split('\0') if name}
+        return sorted(path for path in files if (skin_dir / path).is_file())
+    except (OSError, subprocess.CalledProcessError):
+        pass
+
+    patterns = _gitignore_patterns(skin_dir)
+    files = []
+    for path in sorted(skin_dir.rglob('*')):
+        relative = path.relative_to(skin_dir)
+        if path.is_file() and '.git' not in relative.parts and not _is_ignored(relative, patterns):
+            files.append(relative)
+    return files
+
+
+def is_dev_file(relative):
+    return relative.parts[0] in DEV_PATHS
+
+
+def stage_skin(skin_dir, staging_dir):
+    """Copy the packageable parts of the skin into staging_dir."""
+    if staging_dir.exists():
+        shutil.rmtree(staging_dir)
+
+    for relative in list_source_files(skin_dir):
+        if is_dev_file(relative):
+            continue
+
+        target = staging_dir / relative
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(skin_dir / relative, target)
+
+
+def write_zip(staging_dir, zip_path):
+    """Zip the staged skin under a top-level skin.streamflix/ folder."""
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for path in sorted(staging_dir.rglob('*')):
+            if path.is_file():
+                zf.write(path, Path(SKIN_NAME) / path.relative_to(staging_dir))
+
+
+def benchmark_texture_loading(bundle_path, textures, repeat=20):
+    """Time reading the referenced textures as loose files vs from the bundle.
+
+    This only counts file opens and times open()/read() on a warm page
+    cache; it is not a Kodi startup measurement. textures maps bundle
+    names to the loose files. Returns a dict of median timings (ms), file
+    opens and bytes read per load.
+    """
+    loose_times = []
+    bundle_times = []
+    loose_bytes = sum(path.stat().st_size for path in textures.values())
+    with open(bundle_path, 'rb') as f:
+        index = xbt.read_xbt_index(f)
+        bundle_bytes = f.tell() + sum(frame.packed_size for name in textures for frame in index[name].frames)
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path in textures.values():
+            with open(path, 'rb') as f:
+                f.read()
+        loose_times.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        with open(bundle_path, 'rb') as f:
+            index = xbt.read_xbt_index(f)
+            for name in textures:
+                for frame in index[name].frames:
+                    f.seek(frame.offset)
+                    f.read(frame.packed_size)
+        bundle_times.append((time.perf_counter() - start) * 1000)
+
+    return {
+        'textures': len(textures),
+        'loose_ms': statistics.median(loose_times),
+        'loose_opens': len(textures),
+        'loose_bytes': loose_bytes,
+        'bundle_ms': statistics.median(bundle_times),
+        'bundle_opens': 1,
+        'bundle_bytes': bundle_bytes,
+    }
+
+
+def main():
+    """Main entry point."""
+    script_dir = Path(__file__).parent
+    skin_dir = script_dir.parent
+
+    parser = argparse.ArgumentParser(description='Build the StreamFlix skin package')
+    parser.add_argument('--output', type=Path, default=skin_dir.parent / 'build',
+                        help='Directory for the built zips (default: ../build)')
+    parser.add_argument('--compress', action='store_true',
+                        help='LZO compress textures where it saves space; the default when '
+                             'python-lzo is installed, this makes it an error if it is not')
+    parser.add_argument('--raw-textures', action='store_true',
+                        help='Store every texture uncompressed')
+    parser.add_argument('--no-compress', action='append', default=[], metavar='PATH',
+                        help='Store this texture uncompressed even with --compress (repeatable)')
+    parser.add_argument('--no-bundle', action='store_true',
+                        help='Ship media/ as loose files like the old build.sh')
+    parser.add_argument('--no-optimize', action='store_true',
+                        help='Skip deduplication, unused asset removal and PNG recompression')
+    parser.add_argument('--flatten', action='store_true',
+                        help='Expand includes into each window and minify the XML')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='Compare file opens, bytes read and read time (warm cache) '
+                             'for loose textures vs the bundle')
+    args = parser.parse_args()
+
+    if args.benchmark and args.no_bundle:
+        parser.error('--benchmark compares against the texture bundle and cannot be used with --no-bundle')
+    if args.compress and args.raw_textures:
+        parser.error('--compress and --raw-textures are mutually exclusive')
+
+    version, xml_dir = read_addon_info(skin_dir)
+    output_dir = args.output
+    staging_dir = output_dir / 'staging' / SKIN_NAME
+    staged_xml_dir = staging_dir / xml_dir.relative_to(skin_dir)
+    media_dir = staging_dir / 'media'
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    print(f"📦 Building {SKIN_NAME} {version}")
+    print("=" * 60)
+
+    stage_skin(skin_dir, staging_dir)
+
+    if args.no_optimize:
+        references = assets.collect_texture_references(staged_xml_dir)
+    else:
+        try:
+            report, references = assets.optimize_skin(staging_dir, staged_xml_dir)
+        except assets.AssetError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        assets.print_report(report)
+
+    if args.flatten:
+        try:
+            flatten_xml.print_report(flatten_xml.flatten_skin(staged_xml_dir))
+        except (flatten_xml.FlattenError, ET.ParseError) as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+    print(f"\nFound {len(references)} texture(s) referenced in {xml_dir.relative_to(skin_dir)}")
+
+    if args.no_bundle:
+        missing = check_references(references, None, set(assets.find_media_files(media_dir)))
+    else:
+        skip = {xbt.normalize_texture_path(p) for p in args.no_compress}
+        use_lzo = args.compress or (xbt.LZO_AVAILABLE and not args.raw_textures)
+        compress = (lambda name: name not in skip) if use_lzo else False
+        bundle_path = output_dir / BUNDLE_NAME
+
+        try:
+            packed, loose = pack_textures(media_dir, bundle_path, compress)
+        except xbt.XBTError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+
+        missing = check_references(references, bundle_path, set(loose))
+
+        raw_size = sum(path.stat().st_size for path in packed.values())
+        bundle_size = bundle_path.stat().st_size
+        print(f"Packed {len(packed)} texture(s) into media/{BUNDLE_NAME} "
+              f"({raw_size:,} bytes of PNG -> {bundle_size:,} bytes{', LZO' if use_lzo else ', uncompressed'})")
+        if bundle_size > raw_size:
+            hint = "" if use_lzo else "; install python-lzo to compress it"
+            print(f"⚠️  The bundle is {bundle_size / max(raw_size, 1):.0f}x the size of its PNGs, "
+                  f"so Kodi reads more bytes from disk{hint}")
+        if loose:
+            print(f"Shipping {len(loose)} texture(s) loose: {', '.join(sorted(loose))}")
+
+        if args.benchmark:
+            textures = {name: packed[name] for name in sorted(references) if name in packed}
+            result = benchmark_texture_loading(bundle_path, textures)
+            print(f"\n⏱  Reading {result['textures']} referenced texture(s) "
+                  f"(file opens, bytes read and read time, warm cache):")
+            print(f"   before: {result['loose_opens']} file opens, {result['loose_bytes']:,} bytes, "
+                  f"{result['loose_ms']:.2f} ms")
+            print(f"   after:  {result['bundle_opens']} file open,  {result['bundle_bytes']:,} bytes, "
+                  f"{result['bundle_ms']:.2f} ms")
+
+        # Bundled textures no longer need to ship as loose files
+        for path in packed.values():
+            path.unlink()
+        assets.remove_empty_dirs(media_dir)
+        media_dir.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(bundle_path), media_dir / BUNDLE_NAME)
+
+    if missing:
+        print("❌ Textures referenced by the skin but not packaged:")
+        for entry in missing:
+            print(f"   {entry}")
+        sys.exit(1)
+
+    zip_path = output_dir / f"{SKIN_NAME}-{version}.zip"
+    write_zip(staging_dir, zip_path)
+    shutil.copy2(zip_path, output_dir / f"{SKIN_NAME}.zip")
+    shutil.rmtree(output_dir / 'staging')
+
+    print("\n" + "=" * 60)
+    print(f"✅ Created: {zip_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,439 @@
+"""
+Simulated Kodi runtime for StreamFlix
+Shared state behind the fake xbmc, xbmcgui, xbmcaddon and xbmcvfs modules:
+a virtual clock, a synthetic video library served over JSON-RPC with
+injectable latency, GUI state driven by scripted traces, and counters the
+benchmarks read.
+"""
+
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import types
+from collections import Counter
+
+TITLE_WORDS = [
+    'the', 'dark', 'last', 'lost', 'city', 'night', 'star', 'road', 'home', 'fire',
+    'blue', 'red', 'river', 'king', 'queen', 'dead', 'secret', 'house', 'world', 'man',
+    'woman', 'island', 'storm', 'winter', 'summer', 'ghost', 'shadow', 'edge', 'black',
+    'white', 'silent', 'wild', 'long', 'way', 'north', 'south', 'matrix', 'empire',
+    'legend', 'game', 'dream', 'heart', 'stone', 'glass', 'iron', 'gold', 'crown',
+    'moon', 'sun', 'ocean',
+]
+
+
+class SimulationError(Exception):
+    pass
+
+
+class VirtualClock:
+    """Simulated time shared by every thread the runtime tracks.
+
+    Tracked threads block in sleep() until the driver moves time forward
+    with advance(), which returns once every thread that was due to wake
+    has run and gone back to sleep (or exited). That keeps multi-threaded
+    runs deterministic and lets a minute of service time pass in
+    milliseconds.
+
+    Only tracked threads may block on the clock: the driver thread is the
+    one advancing it, so a sleep there would never return and raises
+    SimulationError instead.
+    """
+
+    def __init__(self, quiescence_timeout=5.0):
+        self._now = 0.0
+        self._cond = threading.Condition()
+        self._active = 0
+        self._sleeping = {}
+        self._tracked = set()
+        self._aborted = False
+        self.quiescence_timeout = quiescence_timeout
+        self.wakeups = 0
+        self.threads_started = 0
+        self.Thread = self._thread_class()
+        self.Event = self._event_class()
+        self.Timer = self._timer_class()
+
+    def time(self):
+        return self._now
+
+    monotonic = time
+
+    def sleep(self, seconds):
+        """Block the calling thread until the clock passes now + seconds."""
+        with self._cond:
+            self._wait(self._now + max(seconds, 0), lambda: False)
+
+    def _wait(self, target, done):
+        """Block until done() or the clock reaches target (None waits for done() only).
+
+        Called with _cond held. Returns done(). Returning because target
+        was reached (a sleep ending, an Event.wait timing out, a Timer
+        firing) counts as a wakeup.
+        """
+        if done() or self._aborted or (target is not None and self._now >= target):
+            return self._waited(target, done)
+
+        ident = threading.get_ident()
+        if ident not in self._tracked:
+            raise SimulationError("Blocking wait on a thread the virtual clock doesn't track would never "
+                                  "return; run it in clock.Thread")
+
+        self._sleeping[ident] = float('inf') if target is None else target
+        self._active -= 1
+        self._cond.notify_all()
+        while not done() and not self._aborted and (target is None or self._now < target):
+            self._cond.wait()
+        # _wake() may already have marked this thread runnable
+        if self._sleeping.pop(ident, None) is not None:
+            self._active += 1
+        return self._waited(target, done)
+
+    def _waited(self, target, done):
+        result = done()
+        if not result and not self._aborted and target is not None and self._now >= target:
+            self.wakeups += 1
+        return result
+
+    def _wake(self, idents):
+        """Mark sleeping threads runnable before they get the lock back, so
+        advance() keeps waiting for them. Called with _cond held."""
+        for ident in idents:
+            if self._sleeping.pop(ident, None) is not None:
+                self._active += 1
+        self._cond.notify_all()
+
+    def spend(self, seconds):
+        """Move time forward from inside the single running thread (e.g. RPC latency)."""
+        with self._cond:
+            self._now += seconds
+            self._cond.notify_all()
+
+    def advance(self, seconds):
+        """Move time forward and wait until every due thread is asleep again."""
+        deadline = time.monotonic() + self.quiescence_timeout
+        with self._cond:
+            self._now += seconds
+            self._cond.notify_all()
+            while self._active > 0 or any(t <= self._now for t in self._sleeping.values()):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise SimulationError("Tracked threads did not go idle (blocked outside the virtual clock?)")
+                self._cond.wait(remaining)
+
+    def abort(self):
+        """Wake every sleeper; further sleeps return immediately."""
+        with self._cond:
+            self._aborted = True
+            self._cond.notify_all()
+
+    def _thread_class(self):
+        clock = self
+
+        class Thread(threading.Thread):
+            """threading.Thread that runs on the virtual clock."""
+
+            def start(self):
+                with clock._cond:
+                    clock._active += 1
+                    clock.threads_started += 1
+                super().start()
+
+            def run(self):
+                clock._tracked.add(threading.get_ident())
+                try:
+                    super().run()
+                finally:
+                    with clock._cond:
+                        clock._tracked.discard(threading.get_ident())
+                        clock._active -= 1
+                        clock._cond.notify_all()
+
+        return Thread
+
+    def _event_class(self):
+        clock = self
+
+        class Event:
+            """threading.Event whose wait() timeout runs on the virtual clock."""
+
+            def __init__(self):
+                self._flag = False
+                self._waiters = set()
+
+            def is_set(self):
+                return self._flag
+
+            isSet = is_set
+
+            def set(self):
+                with clock._cond:
+                    self._flag = True
+                    clock._wake(self._waiters)
+                    self._waiters.clear()
+
+            def clear(self):
+                with clock._cond:
+                    self._flag = False
+
+            def wait(self, timeout=None):
+                target = None if timeout is None else clock._now + max(timeout, 0)
+                ident = threading.get_ident()
+                with clock._cond:
+                    self._waiters.add(ident)
+                    try:
+                        return clock._wait(target, self.is_set)
+                    finally:
+                        self._waiters.discard(ident)
+
+        return Event
+
+    def _timer_class(self):
+        clock = self
+
+        class Timer(clock.Thread):
+            """threading.Timer that counts its interval on the virtual clock."""
+
+            def __init__(self, interval, function, args=None, kwargs=None):
+                super().__init__(target=self._fire)
+                self.interval = interval
+                self.function = function
+                self.args = args if args is not None else []
+                self.kwargs = kwargs if kwargs is not None else {}
+                self.finished = clock.Event()
+
+            def cancel(self):
+                self.finished.set()
+
+            def _fire(self):
+                self.finished.wait(self.interval)
+                if not self.finished.is_set():
+                    self.function(*self.args, **self.kwargs)
+                self.finished.set()
+
+        return Timer
+
+    def threading_module(self):
+        """A stand-in for the threading module running on this clock.
+
+        Thread, Timer and Event are replaced. Other primitives that can
+        block with a timeout can't be simulated and raise SimulationError
+        when created, rather than silently waiting on real time.
+        """
+        module = types.ModuleType('threading')
+        module.__dict__.update(threading.__dict__)
+        module.Thread = self.Thread
+        module.Timer = self.Timer
+        module.Event = self.Event
+
+        def unsupported(name):
+            def create(*args, **kwargs):
+                raise SimulationError(f"threading.{name} is not supported on the virtual clock")
+            return create
+
+        for name in ('Condition', 'Semaphore', 'BoundedSemaphore', 'Barrier'):
+            setattr(module, name, unsupported(name))
+        return module
+
+    def time_module(self):
+        """A stand-in for the time module backed by this clock."""
+        module = types.ModuleType('time')
+        module.__dict__.update(time.__dict__)
+        module.time = self.time
+        module.monotonic = self.time
+        module.sleep = self.sleep
+        return module
+
+
+class VideoLibrary:
+    """Synthetic movies and TV shows with deterministic titles."""
+
+    def __init__(self, size=1000, seed=1):
+        rng = random.Random(seed)
+        self.movies = []
+        self.tvshows = []
+
+        for index in range(size):
+            title = ' '.join(rng.choice(TITLE_WORDS) for _ in range(rng.randint(1, 4))).title()
+            item = {
+                'label': f"{title} {index}",
+                'title': f"{title} {index}",
+                'year': 1950 + rng.randint(0, 75),
+                'genre': [rng.choice(['Drama', 'Comedy', 'Action', 'Thriller'])],
+                'rating': round(rng.uniform(1, 10), 1),
+                'file': f"/media/video/{index}.mkv",
+                'art': {'poster': f"/media/art/{index}-poster.jpg", 'fanart': f"/media/art/{index}-fanart.jpg"},
+            }
+            if index % 2:
+                item['tvshowid'] = index
+                self.tvshows.append(item)
+            else:
+                item['movieid'] = index
+                self.movies.append(item)
+
+        self.movies.sort(key=lambda item: item['title'].lower())
+        self.tvshows.sort(key=lambda item: item['title'].lower())
+
+    def query(self, items, params):
+        rule = params.get('filter') or {}
+        if rule.get('field') == 'title' and rule.get('operator') == 'contains':
+            needle = str(rule.get('value', '')).lower()
+            items = [item for item in items if needle in item['title'].lower()]
+
+        if (params.get('sort') or {}).get('order') == 'descending':
+            items = items[::-1]
+
+        limits = params.get('limits') or {}
+        start = limits.get('start', 0)
+        end = limits.get('end', len(items))
+        properties = set(params.get('properties') or [])
+        id_keys = {'movieid', 'tvshowid', 'label'}
+
+        page = [
+            {key: value for key, value in item.items() if key in properties or key in id_keys}
+            for item in items[start:end]
+        ]
+        return page, {'start': start, 'end': start + len(page), 'total': len(items)}
+
+
+class KodiRuntime:
+    """State shared by the fake Kodi modules for one simulated session."""
+
+    def __init__(self, library_size=1000, rpc_latency=0.0, seed=1, addon_info=None, root=None):
+        self.clock = VirtualClock()
+        self.library = VideoLibrary(library_size, seed)
+        self.rpc_latency = rpc_latency
+        self.aborted = False
+
+        if root is None:
+            # Removed when the runtime is garbage collected
+            self._tempdir = tempfile.TemporaryDirectory(prefix='fake-kodi-')
+            root = self._tempdir.name
+        self.root = root
+        self.special = {
+            'special://home/': os.path.join(self.root, 'home'),
+            'special://userdata/': os.path.join(self.root, 'userdata'),
+            'special://profile/': os.path.join(self.root, 'userdata'),
+            'special://temp/': os.path.join(self.root, 'temp'),
+        }
+        self.addon_info = {'id': 'skin.streamflix', 'name': 'StreamFlix', 'version': '0.0.0',
+                           'path': os.path.join(self.root, 'addon')}
+        self.addon_info.update(addon_info or {})
+        self.settings = {}
+
+        self.conditions = {}
+        self.infolabels = {}
+        self.window_properties = {}
+        self.controls = {}
+
+        self.logs = []
+        self.builtins = []
+        self.rpc_calls = Counter()
+        self.rpc_wall_time = 0.0
+        self.gui_queries = Counter()
+        self.list_updates = Counter()
+        self.list_updated_at = {}
+        self.vfs_calls = Counter()
+        self.addon_lookups = 0
+
+    # -- Scripted GUI state -------------------------------------------------
+
+    def show_window(self, window, content=None):
+        """Make window the visible window, optionally showing content."""
+        self.conditions = {key: value for key, value in self.conditions.items()
+                           if not key.startswith(('Window.IsVisible(', 'Container.Content('))}
+        self.conditions[f'Window.IsVisible({window})'] = True
+        if content:
+            self.conditions[f'Container.Content({content})'] = True
+
+    def focus_item(self, label, path='', container=50):
+        """Move focus in container to an item."""
+        self.infolabels[f'Container({container}).ListItem.Label'] = label
+        self.infolabels[f'Container({container}).ListItem.FileNameAndPath'] = path
+
+    # -- Fake module backends ----------------------------------------------
+
+    def list_updated(self, control_id):
+        self.list_updates[control_id] += 1
+        self.list_updated_at[control_id] = self.clock.time()
+
+    def get_condition(self, condition):
+        self.gui_queries['getCondVisibility'] += 1
+        negate = condition.startswith('!')
+        value = bool(self.conditions.get(condition.lstrip('!'), False))
+        return value != negate
+
+    def get_infolabel(self, label):
+        self.gui_queries['getInfoLabel'] += 1
+        return self.infolabels.get(label, '')
+
+    def execute_builtin(self, command):
+        self.builtins.append(command)
+        if command.startswith('PlayMedia('):
+            self.conditions['Player.Playing'] = True
+        elif command == 'PlayerControl(Stop)':
+            self.conditions['Player.Playing'] = False
+
+    def execute_jsonrpc(self, request):
+        start = time.perf_counter()
+        payload = json.loads(request)
+        method = payload.get('method')
+        params = payload.get('params') or {}
+        self.rpc_calls[method] += 1
+
+        if method == 'VideoLibrary.GetMovies':
+            items, limits = self.library.query(self.library.movies, params)
+            response = {'result': {'movies': items, 'limits': limits}}
+        elif method == 'VideoLibrary.GetTVShows':
+            items, limits = self.library.query(self.library.tvshows, params)
+            response = {'result': {'tvshows': items, 'limits': limits}}
+        elif method == 'JSONRPC.Ping':
+            response = {'result': 'pong'}
+        else:
+            response = {'error': {'code': -32601, 'message': 'Method not found.'}}
+
+        response.update({'id': payload.get('id'), 'jsonrpc': '2.0'})
+        result = json.dumps(response)
+        self.rpc_wall_time += time.perf_counter() - start
+        if self.rpc_latency:
+            self.clock.spend(self.rpc_latency)
+        return result
+
+    def translate_path(self, path):
+        for prefix, target in self.special.items():
+            if path.startswith(prefix):
+                return os.path.join(target, path[len(prefix):])
+        return path
+
+    def abort(self):
+        self.aborted = True
+        self.clock.abort()
+
+    def attach(self, module):
+        """Point a loaded add-on module's time and threading at the virtual clock."""
+        if hasattr(module, 'time'):
+            module.time = self.clock.time_module()
+        if hasattr(module, 'threading'):
+            module.threading = self.clock.threading_module()
+        return module
+
+
+_runtime = None
+
+
+def current():
+    """The active runtime, created with defaults on first use."""
+    global _runtime
+    if _runtime is None:
+        _runtime = KodiRuntime()
+    return _runtime
+
+
+def reset(**config):
+    """Start a fresh simulated session and make it the active runtime."""
+    global _runtime
+    _runtime = KodiRuntime(**config)
+    return _runtime
@@ -0,0 +1,48 @@
+"""Fake xbmc module backed by the simulated Kodi runtime."""
+
+import kodi_runtime
+
+LOGDEBUG = 0
+LOGINFO = 1
+LOGWARNING = 2
+LOGERROR = 3
+LOGFATAL = 4
+LOGNONE = 5
+
+
+def log(msg, level=LOGDEBUG):
+    kodi_runtime.current().logs.append((level, msg))
+
+
+def executebuiltin(function, wait=False):
+    kodi_runtime.current().execute_builtin(function)
+
+
+def executeJSONRPC(jsonrpccommand):
+    return kodi_runtime.current().execute_jsonrpc(jsonrpccommand)
+
+
+def getCondVisibility(condition):
+    return kodi_runtime.current().get_condition(condition)
+
+
+def getInfoLabel(infotag):
+    return kodi_runtime.current().get_infolabel(infotag)
+
+
+def sleep(timemillis):
+    kodi_runtime.current().clock.sleep(timemillis / 1000.0)
+
+
+class Monitor:
+    def abortRequested(self):
+        return kodi_runtime.current().aborted
+
+    def waitForAbort(self, timeout=None):
+        runtime = kodi_runtime.current()
+        if timeout is None:
+            while not runtime.aborted:
+                runtime.clock.sleep(3600)
+        else:
+            runtime.clock.sleep(timeout)
+        return runtime.aborted
@@ -0,0 +1,28 @@
+"""Fake xbmcaddon module backed by the simulated Kodi runtime."""
+
+import kodi_runtime
+
+
+class Addon:
+    def __init__(self, id=None):
+        runtime = kodi_runtime.current()
+        runtime.addon_lookups += 1
+        self._id = id or runtime.addon_info['id']
+
+    def getAddonInfo(self, id):
+        return kodi_runtime.current().addon_info.get(id, '')
+
+    def getSetting(self, id):
+        return kodi_runtime.current().settings.get(id, '')
+
+    def getSettingString(self, id):
+        return self.getSetting(id)
+
+    def setSetting(self, id, value):
+        kodi_runtime.current().settings[id] = str(value)
+
+    def setSettingString(self, id, value):
+        self.setSetting(id, value)
+
+    def getLocalizedString(self, id):
+        return str(id)
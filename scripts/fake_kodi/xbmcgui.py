@@ -0,0 +1,152 @@
+"""Fake xbmcgui module backed by the simulated Kodi runtime."""
+
+import kodi_runtime
+
+# Controls the fake hands out as lists rather than labels
+LIST_CONTROL_IDS = {50}
+
+
+class ListItem:
+    def __init__(self, label='', label2='', path='', offscreen=False):
+        self._label = label
+        self._label2 = label2
+        self._path = path
+        self._art = {}
+        self._properties = {}
+
+    def getLabel(self):
+        return self._label
+
+    def getLabel2(self):
+        return self._label2
+
+    def setLabel(self, label):
+        self._label = label
+
+    def setArt(self, values):
+        self._art.update(values)
+
+    def getArt(self, key):
+        return self._art.get(key, '')
+
+    def setProperty(self, key, value):
+        self._properties[key.lower()] = value
+
+    def getProperty(self, key):
+        return self._properties.get(key.lower(), '')
+
+    def getPath(self):
+        return self._path
+
+
+class Control:
+    def __init__(self, control_id):
+        self._id = control_id
+
+    def getId(self):
+        return self._id
+
+
+class ControlLabel(Control):
+    def __init__(self, control_id):
+        super().__init__(control_id)
+        self._label = ''
+
+    def setLabel(self, label='', *args, **kwargs):
+        self._label = label
+
+    def getLabel(self):
+        return self._label
+
+
+class ControlList(Control):
+    def __init__(self, control_id):
+        super().__init__(control_id)
+        self._items = []
+        self._selected = 0
+
+    def reset(self):
+        self._items = []
+        self._selected = 0
+        kodi_runtime.current().list_updated(self._id)
+
+    def addItem(self, item):
+        self._items.append(item if isinstance(item, ListItem) else ListItem(item))
+        kodi_runtime.current().list_updated(self._id)
+
+    def addItems(self, items):
+        for item in items:
+            self.addItem(item)
+
+    def size(self):
+        return len(self._items)
+
+    def selectItem(self, index):
+        self._selected = index
+
+    def getSelectedPosition(self):
+        return self._selected if self._items else -1
+
+    def getSelectedItem(self):
+        return self._items[self._selected] if self._items else None
+
+    def getListItem(self, index):
+        return self._items[index]
+
+
+class Action:
+    def __init__(self, action_id, button_code=0):
+        self._id = action_id
+        self._button_code = button_code
+
+    def getId(self):
+        return self._id
+
+    def getButtonCode(self):
+        return self._button_code
+
+
+class Window:
+    def __init__(self, existingWindowId=-1):
+        self._window_id = existingWindowId
+
+    def _properties(self):
+        # Subclasses such as WindowXML windows may skip Window.__init__
+        window_id = getattr(self, '_window_id', -1)
+        return kodi_runtime.current().window_properties.setdefault(window_id, {})
+
+    def setProperty(self, key, value):
+        self._properties()[key.lower()] = value
+
+    def getProperty(self, key):
+        return self._properties().get(key.lower(), '')
+
+    def clearProperty(self, key):
+        self._properties().pop(key.lower(), None)
+
+    def clearProperties(self):
+        self._properties().clear()
+
+    def getControl(self, controlId):
+        controls = kodi_runtime.current().controls.setdefault(id(self), {})
+        if controlId not in controls:
+            control_class = ControlList if controlId in LIST_CONTROL_IDS else ControlLabel
+            controls[controlId] = control_class(controlId)
+        return controls[controlId]
+
+    def close(self):
+        self.closed = True
+
+    def doModal(self):
+        self.onInit()
+
+    def show(self):
+        self.onInit()
+
+    def onInit(self):
+        pass
+
+
+class WindowXML(Window):
+    def __init__(self, xmlFilename, scriptPath, defaultSkin='Default', defaultRes='720p', isMedia=False):
+        super().__init__()
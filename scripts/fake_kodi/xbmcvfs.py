@@ -0,0 +1,75 @@
+"""Fake xbmcvfs module backed by the simulated Kodi runtime and a temp directory."""
+
+import os
+import shutil
+
+import kodi_runtime
+
+
+def _count(name):
+    kodi_runtime.current().vfs_calls[name] += 1
+
+
+def translatePath(path):
+    return kodi_runtime.current().translate_path(path)
+
+
+def exists(path):
+    _count('exists')
+    return os.path.exists(translatePath(path))
+
+
+def mkdirs(path):
+    _count('mkdirs')
+    os.makedirs(translatePath(path), exist_ok=True)
+    return True
+
+
+def copy(strSource, strDestination):
+    _count('copy')
+    shutil.copyfile(translatePath(strSource), translatePath(strDestination))
+    return True
+
+
+def delete(file):
+    _count('delete')
+    try:
+        os.remove(translatePath(file))
+    except OSError:
+        return False
+    return True
+
+
+def rename(file, newFileName):
+    _count('rename')
+    os.replace(translatePath(file), translatePath(newFileName))
+    return True
+
+
+class File:
+    def __init__(self, filepath, mode=None):
+        _count('File')
+        self._file = open(translatePath(filepath), 'wb' if mode == 'w' else 'rb')
+
+    def read(self, numBytes=-1):
+        data = self._file.read(numBytes)
+        return data.decode('utf-8') if isinstance(data, bytes) else data
+
+    def readBytes(self, numBytes=-1):
+        return bytearray(self._file.read(numBytes))
+
+    def write(self, buffer):
+        self._file.write(buffer.encode('utf-8') if isinstance(buffer, str) else bytes(buffer))
+        return True
+
+    def size(self):
+        return os.fstat(self._file.fileno()).st_size
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
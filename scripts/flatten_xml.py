@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Build-time include flattening for StreamFlix
+Expands <include>, $PARAM, constants and single-value variables from
+Includes.xml into each window and writes it back without comments or
+indentation, so Kodi has less to parse and resolve when a window opens.
+"""
+
+import copy
+import re
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import kodi_includes
+
+INCLUDES_FILE = 'Includes.xml'
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8"?>\n'
+
+PARAM_PATTERN = re.compile(r'\$PARAM\[([^\]]+)\]')
+VAR_PATTERN = re.compile(r'\$VAR\[(\w+)\]')
+EXP_PATTERN = re.compile(r'\$EXP\[(\w+)\]')
+
+# Tags and attributes Kodi resolves <constant> names in (GUIIncludes.cpp)
+CONSTANT_NODES = {
+    'posx', 'posy', 'left', 'centerleft', 'right', 'centerright', 'top', 'centertop',
+    'bottom', 'centerbottom', 'width', 'height', 'offsetx', 'offsety', 'textoffsetx',
+    'textoffsety', 'textwidth', 'spinposx', 'spinposy', 'spinwidth', 'spinheight',
+    'radioposx', 'radioposy', 'radiowidth', 'radioheight', 'sliderwidth', 'sliderheight',
+    'itemgap', 'bordersize', 'timeperimage', 'fadetime', 'pauseatend', 'depth',
+    'movement', 'focusposition',
+}
+CONSTANT_ATTRIBUTES = {
+    'x', 'y', 'width', 'height', 'center', 'max', 'min', 'w', 'h', 'time',
+    'acceleration', 'delay', 'start', 'end', 'border', 'repeat',
+}
+
+# Tags and attributes Kodi resolves $EXP[...] in (GUIIncludes.cpp)
+EXPRESSION_NODES = {'visible', 'enable', 'usealttexture', 'selected'}
+EXPRESSION_ATTRIBUTES = {'condition'}
+
+
+class FlattenError(Exception):
+    pass
+
+
+def _condensed(text):
+    """Text with whitespace collapsed as Kodi's XML parser does, or '' if blank."""
+    return ' '.join((text or '').split())
+
+
+class Includes:
+    """Definitions loaded from Includes.xml and the files it pulls in.
+
+    As in Kodi, the first definition of a name wins.
+    """
+
+    def __init__(self):
+        self.includes = {}
+        self.constants = {}
+        self.expressions = {}
+        self.variables = {}
+
+    @classmethod
+    def load(cls, xml_dir):
+        includes = cls()
+        includes._load_file(Path(xml_dir), INCLUDES_FILE, set())
+        return includes
+
+    def _load_file(self, xml_dir, name, seen):
+        if name in seen or not (xml_dir / name).exists():
+            return
+        seen.add(name)
+
+        # Kodi registers a file's includes (and the files they pull in)
+        # before its constants, expressions and variables
+        root = ET.parse(xml_dir / name).getroot()
+        for element in root.findall('include'):
+            if element.get('name') and (len(element) or _condensed(element.text)):
+                self.includes.setdefault(element.get('name'), element)
+            elif element.get('file'):
+                if element.get('condition'):
+                    raise FlattenError(f"Conditional <include file=\"{element.get('file')}\"> is not supported")
+                self._load_file(xml_dir, element.get('file'), seen)
+
+        for element in root:
+            if not element.get('name') or not _condensed(element.text):
+                continue
+            if element.tag == 'constant':
+                self.constants.setdefault(element.get('name'), _condensed(element.text))
+            elif element.tag == 'expression':
+                self.expressions.setdefault(element.get('name'), _condensed(element.text))
+        for element in root.findall('variable'):
+            if element.get('name'):
+                self.variables.setdefault(element.get('name'), element)
+
+    def static_variable(self, name):
+        """Return the value of a variable with a single unconditional value, else None."""
+        variable = self.variables.get(name)
+        if variable is None:
+            return None
+        values = variable.findall('value')
+        if len(values) != 1 or values[0].get('condition'):
+            return None
+        return _condensed(values[0].text)
+
+
+def _substitute(value, pattern, lookup):
+    return pattern.sub(lambda m: lookup(m.group(1), m.group(0)), value)
+
+
+def _substitute_tree(element, pattern, lookup, nodes=None, attributes=None):
+    """Substitute pattern in text and attribute values, optionally only in the given tags/attributes."""
+    for node in element.iter():
+        for key, value in node.attrib.items():
+            if attributes is None or key in attributes:
+                node.set(key, _substitute(value, pattern, lookup))
+        if node.text and (nodes is None or node.tag in nodes):
+            node.text = _substitute(node.text, pattern, lookup)
+
+
+def _is_undefined_param(value, params):
+    """True if value is nothing but a $PARAM[...] the include call doesn't define."""
+    match = PARAM_PATTERN.fullmatch(value)
+    return match is not None and match.group(1) not in params
+
+
+def _substitute_params(element, params):
+    """Substitute $PARAM references under element, in place.
+
+    An undefined param becomes an empty string. As in Kodi, a <param>
+    passed on to a nested include whose value is only an undefined param
+    is dropped instead, so the nested include's default applies.
+    """
+    for node in list(element.iter()):
+        if node.tag == 'include':
+            for param in node.findall('param'):
+                if (_is_undefined_param(param.get('value', ''), params)
+                        or _is_undefined_param(_condensed(param.text), params)):
+                    node.remove(param)
+
+    _substitute_tree(element, PARAM_PATTERN, lambda name, _match: params.get(name, ''))
+
+
+def _params(element, value_attribute):
+    """<param> values under element: the value_attribute, else the text, else ''.
+
+    The first <param> of a name wins.
+    """
+    params = {}
+    for param in element.findall('param'):
+        if param.get('name'):
+            value = param.get(value_attribute)
+            params.setdefault(param.get('name'), _condensed(param.text) if value is None else value)
+    return params
+
+
+def _include_params(call, include):
+    """The params of an include call over the include's defaults.
+
+    Only an include with a <definition> has defaults, and only the
+    <include content="..."> form of a call passes params.
+    """
+    params = _params(call, 'value') if call.get('content') else {}
+    if include.find('definition') is not None:
+        for name, value in _params(include, 'default').items():
+            params.setdefault(name, value)
+    return params
+
+
+def _include_body(include):
+    """The elements an include inserts: its <definition>'s, else all of them (<param> too)."""
+    definition = include.find('definition')
+    return list(include if definition is None else definition)
+
+
+def _include_name(element):
+    """Name of an include call that can be resolved at build time, else None.
+
+    Conditional includes depend on skin settings and calls into other
+    files are left for Kodi to resolve.
+    """
+    if element.tag != 'include' or element.get('condition') or element.get('file'):
+        return None
+    return element.get('content') or _condensed(element.text) or None
+
+
+class Flattener:
+    def __init__(self, includes):
+        self.includes = includes
+        self.expanded = 0
+
+    def expand(self, parent, depth=0):
+        """Replace include calls under parent with their bodies, in place."""
+        if depth > 32:
+            raise FlattenError("Include nesting too deep (recursive include?)")
+
+        index = 0
+        while index < len(parent):
+            child = parent[index]
+            name = _include_name(child)
+            if name is None:
+                self.expand(child, depth)
+                index += 1
+                continue
+
+            include = self.includes.includes.get(name)
+            if include is None:
+                raise FlattenError(f"Unknown include '{name}'")
+            if include.find('.//nested') is not None:
+                # Kodi moves the call's children into <nested/>; leave it to do so
+                index += 1
+                continue
+
+            params = _include_params(child, include)
+            body = [copy.deepcopy(node) for node in _include_body(include)]
+            wrapper = ET.Element('wrapper')
+            wrapper.extend(body)
+            _substitute_params(wrapper, params)
+            self.expand(wrapper, depth + 1)
+
+            parent.remove(child)
+            for offset, node in enumerate(list(wrapper)):
+                parent.insert(index + offset, node)
+            index += len(wrapper)
+            self.expanded += 1
+
+    def resolve_values(self, root):
+        """Inline constants, $EXP expressions and single-value $VAR references."""
+        includes = self.includes
+
+        def variable(name, match):
+            value = includes.static_variable(name)
+            return match if value is None else value
+
+        def expression(name, match):
+            value = includes.expressions.get(name)
+            return match if value is None else f"[{value}]"
+
+        _substitute_tree(root, VAR_PATTERN, variable)
+        _substitute_tree(root, EXP_PATTERN, expression, EXPRESSION_NODES, EXPRESSION_ATTRIBUTES)
+
+        if includes.constants:
+            for node in root.iter():
+                if node.tag in CONSTANT_NODES and node.text and node.text.strip() in includes.constants:
+                    node.text = includes.constants[node.text.strip()]
+                for key, value in node.attrib.items():
+                    if key in CONSTANT_ATTRIBUTES and value in includes.constants:
+                        node.set(key, includes.constants[value])
+
+
+def flatten_window(root, includes):
+    """Return (flattened copy of a window tree, number of includes expanded)."""
+    root = copy.deepcopy(root)
+    flattener = Flattener(includes)
+    flattener.expand(root)
+    flattener.resolve_values(root)
+    return root, flattener.expanded
+
+
+def minify(root):
+    """Drop whitespace-only text between elements, in place."""
+    for node in root.iter():
+        if node.text is not None and not node.text.strip() and len(node):
+            node.text = None
+        if node.tail is not None and not node.tail.strip():
+            node.tail = None
+    return root
+
+
+def structural_diff(expected, actual, path=''):
+    """List the differences between two element trees."""
+    path = f"{path}/{expected.tag}"
+    if expected.tag != actual.tag:
+        return [f"{path}: tag {expected.tag!r} != {actual.tag!r}"]
+
+    diffs = []
+    if dict(expected.attrib) != dict(actual.attrib):
+        diffs.append(f"{path}: attributes {dict(expected.attrib)} != {dict(actual.attrib)}")
+    if (expected.text or '').strip() != (actual.text or '').strip():
+        diffs.append(f"{path}: text {(expected.text or '').strip()!r} != {(actual.text or '').strip()!r}")
+    if len(expected) != len(actual):
+        diffs.append(f"{path}: {len(expected)} children != {len(actual)}")
+
+    for index, (a, b) in enumerate(zip(expected, actual)):
+        diffs.extend(structural_diff(a, b, f"{path}[{index}]"))
+    return diffs
+
+
+def serialize(root):
+    return XML_DECLARATION + ET.tostring(root, encoding='unicode')
+
+
+def flatten_skin(xml_dir):
+    """Flatten every window in xml_dir in place and minify the other XML.
+
+    Each written window must look the same to Kodi as the original, going
+    by kodi_includes' model of how Kodi loads a window. Returns a list of
+    (file name, bytes before, bytes after, includes expanded).
+    """
+    xml_dir = Path(xml_dir)
+    includes = Includes.load(xml_dir)
+    try:
+        # Load before any file is rewritten
+        kodi = kodi_includes.KodiIncludes(xml_dir)
+    except kodi_includes.IncludeError as e:
+        raise FlattenError(str(e))
+    results = []
+
+    for xml_file in sorted(xml_dir.glob('*.xml')):
+        original = xml_file.read_text(encoding='utf-8')
+        root = ET.fromstring(original)
+
+        if root.tag == 'window':
+            flattened, expanded = flatten_window(root, includes)
+            output = serialize(minify(flattened))
+            try:
+                diffs = structural_diff(kodi.resolve_window(root), kodi.resolve_window(ET.fromstring(output)))
+            except kodi_includes.IncludeError as e:
+                raise FlattenError(f"{xml_file.name}: {e}")
+            if diffs:
+                raise FlattenError(f"{xml_file.name} changed when flattened:\n   " + "\n   ".join(diffs[:10]))
+        else:
+            expanded = 0
+            output = serialize(minify(root))
+
+        xml_file.write_text(output, encoding='utf-8')
+        results.append((xml_file.name, len(original.encode('utf-8')), len(output.encode('utf-8')), expanded))
+
+    return results
+
+
+def print_report(results):
+    """Print the per-file size reduction from flattening."""
+    print("\n🗜  XML flattening:")
+    before_total = after_total = 0
+    for name, before, after, expanded in results:
+        before_total += before
+        after_total += after
+        change = 100 * (after - before) / before if before else 0
+        includes = f", {expanded} include(s) expanded" if expanded else ""
+        print(f"   {name}: {before:,} -> {after:,} bytes ({change:+.0f}%{includes})")
+    change = 100 * (after_total - before_total) / before_total if before_total else 0
+    print(f"   Total: {before_total:,} -> {after_total:,} bytes ({change:+.0f}%)")
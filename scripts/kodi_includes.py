@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Reference model of Kodi's skin include resolution
+A plain port of what xbmc/guilib/GUIIncludes.cpp does to a window when it
+loads: <include> expansion with params, constants, $EXP expressions and
+(at runtime) single-value $VAR variables. flatten_xml checks its output
+against this model; the two share no code, so a rule one of them gets
+wrong shows up as a difference instead of being repeated on both sides.
+"""
+
+import copy
+import re
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+INCLUDES_FILE = 'Includes.xml'
+
+PARAM_REFERENCE = re.compile(r'\$PARAM\[([^\]]+)\]')
+VAR_REFERENCE = re.compile(r'\$VAR\[([^\]]+)\]')
+EXP_REFERENCE = re.compile(r'\$EXP\[([^\]]+)\]')
+
+# GUIIncludes::m_constantNodes / m_constantAttributes
+CONSTANT_NODES = {
+    'posx', 'posy', 'left', 'centerleft', 'right', 'centerright', 'top', 'centertop',
+    'bottom', 'centerbottom', 'width', 'height', 'offsetx', 'offsety', 'textoffsetx',
+    'textoffsety', 'textwidth', 'spinposx', 'spinposy', 'spinwidth', 'spinheight',
+    'radioposx', 'radioposy', 'radiowidth', 'radioheight', 'sliderwidth', 'sliderheight',
+    'itemgap', 'bordersize', 'timeperimage', 'fadetime', 'pauseatend', 'depth',
+    'movement', 'focusposition',
+}
+CONSTANT_ATTRIBUTES = {
+    'x', 'y', 'width', 'height', 'center', 'max', 'min', 'w', 'h', 'time',
+    'acceleration', 'delay', 'start', 'end', 'border', 'repeat',
+}
+
+# GUIIncludes::m_expressionNodes / m_expressionAttributes
+EXPRESSION_NODES = {'visible', 'enable', 'usealttexture', 'selected'}
+EXPRESSION_ATTRIBUTES = {'condition'}
+
+# Expansions of one node's includes before giving up (recursive include)
+MAX_EXPANSIONS = 1000
+MAX_DEPTH = 100
+
+
+class IncludeError(Exception):
+    pass
+
+
+def _text(node):
+    """Element text the way TinyXML sees it: whitespace condensed, None if blank."""
+    if node.text is None or not node.text.strip():
+        return None
+    return ' '.join(node.text.split())
+
+
+def get_parameters(node, value_attribute):
+    """GUIIncludes::GetParameters: <param name> children, attribute first, then text.
+
+    The first <param> of a name wins.
+    """
+    params = {}
+    for param in node.findall('param'):
+        name = param.get('name')
+        if not name:
+            continue
+        value = param.get(value_attribute)
+        if value is None:
+            value = _text(param) or ''
+        params.setdefault(name, value)
+    return params
+
+
+def resolve_parameters(value, params):
+    """GUIIncludes::ResolveParameters.
+
+    Returns (resolved value or None if there were no params, whether value
+    was a single undefined param).
+    """
+    if '$PARAM[' not in value:
+        return None, False
+    match = PARAM_REFERENCE.fullmatch(value)
+    if match and match.group(1) not in params:
+        return '', True
+    return PARAM_REFERENCE.sub(lambda m: params.get(m.group(1), ''), value), False
+
+
+def resolve_parameters_for_node(node, parent, params):
+    """GUIIncludes::ResolveParametersForNode, in place.
+
+    An undefined param becomes an empty string, except that a <param>
+    passed on to a nested include whose value is only an undefined param
+    is removed, so the nested include's default applies.
+    """
+    for key, value in list(node.attrib.items()):
+        resolved, single_undefined = resolve_parameters(value, params)
+        if single_undefined and node.tag == 'param' and key == 'value' and parent.tag == 'include':
+            parent.remove(node)
+            return
+        if resolved is not None:
+            node.set(key, resolved)
+
+    # TinyXML only looks at the first child: text or elements, not both
+    text = _text(node)
+    if text is not None:
+        resolved, single_undefined = resolve_parameters(text, params)
+        if single_undefined and node.tag == 'param' and parent.tag == 'include':
+            parent.remove(node)
+        elif resolved is not None:
+            node.text = resolved
+    else:
+        for child in list(node):
+            resolve_parameters_for_node(child, node, params)
+
+
+class KodiIncludes:
+    """Include definitions as GUIIncludes loads them, and window resolution."""
+
+    def __init__(self, xml_dir):
+        self.includes = {}  # name -> (definition element, default params)
+        self.constants = {}
+        self.expressions = {}
+        self.variables = {}  # name -> [(condition, value)]
+        self._load(Path(xml_dir), INCLUDES_FILE, set())
+
+    def _load(self, xml_dir, name, seen):
+        """GUIIncludes::LoadIncludesFromXML. Earlier definitions win."""
+        if name in seen or not (xml_dir / name).exists():
+            return
+        seen.add(name)
+        root = ET.parse(xml_dir / name).getroot()
+
+        for node in root.findall('include'):
+            include_name = node.get('name')
+            if include_name and (len(node) or _text(node)):
+                definition = node.find('definition')
+                if definition is not None:
+                    self.includes.setdefault(include_name, (definition, get_parameters(node, 'default')))
+                else:
+                    self.includes.setdefault(include_name, (node, {}))
+            elif node.get('file'):
+                if node.get('condition'):
+                    raise IncludeError(f"Conditional <include file=\"{node.get('file')}\"> can't be modelled")
+                self._load(xml_dir, node.get('file'), seen)
+
+        for node in root.findall('constant'):
+            if node.get('name') and _text(node) is not None:
+                self.constants.setdefault(node.get('name'), _text(node))
+        for node in root.findall('expression'):
+            if node.get('name') and _text(node) is not None:
+                self.expressions.setdefault(node.get('name'), f"[{_text(node)}]")
+        for node in root.findall('variable'):
+            if node.get('name'):
+                self.variables.setdefault(node.get('name'), [
+                    (value.get('condition'), _text(value) or '') for value in node.findall('value')
+                ])
+
+    def resolve_window(self, root):
+        """A copy of a window tree as Kodi sees it after loading.
+
+        Conditional includes, calls into other files and includes using
+        <nested/> stay as they are; they resolve the same way before and
+        after flattening.
+        """
+        root = copy.deepcopy(root)
+        self._resolve_includes(root, 0)
+        for node in root.iter():
+            self._resolve_values(node)
+        return root
+
+    def _resolve_includes(self, node, depth):
+        """GUIIncludes::ResolveIncludesForNode: expand node's include children, then recurse."""
+        if depth > MAX_DEPTH:
+            raise IncludeError("Include nesting too deep (recursive include?)")
+
+        left = set()
+        expansions = 0
+        while True:
+            include = next((child for child in node if child.tag == 'include' and id(child) not in left), None)
+            if include is None:
+                break
+            if include.get('condition') or include.get('file'):
+                left.add(id(include))
+                continue
+
+            if include.get('content'):
+                name = include.get('content')
+                params = get_parameters(include, 'value')
+            else:
+                name = _text(include)
+                params = {}
+            if name not in self.includes:
+                raise IncludeError(f"Unknown include '{name}'")
+
+            definition, defaults = self.includes[name]
+            if definition.find('.//nested') is not None:
+                left.add(id(include))
+                continue
+            for key, value in defaults.items():
+                params.setdefault(key, value)
+
+            expansions += 1
+            if expansions > MAX_EXPANSIONS:
+                raise IncludeError("Include nesting too deep (recursive include?)")
+
+            index = list(node).index(include)
+            for child in definition:
+                inserted = copy.deepcopy(child)
+                node.insert(index, inserted)
+                index += 1
+                resolve_parameters_for_node(inserted, node, params)
+            node.remove(include)
+
+        for child in node:
+            self._resolve_includes(child, depth + 1)
+
+    def _variable(self, match):
+        values = self.variables.get(match.group(1))
+        if values is None or len(values) != 1 or values[0][0]:
+            return match.group(0)
+        return values[0][1]
+
+    def _expression(self, match):
+        return self.expressions.get(match.group(1), match.group(0))
+
+    def _resolve_values(self, node):
+        """Expressions and constants (GUIIncludes), single-value variables (runtime)."""
+        for key, value in list(node.attrib.items()):
+            value = VAR_REFERENCE.sub(self._variable, value)
+            if key in EXPRESSION_ATTRIBUTES:
+                value = EXP_REFERENCE.sub(self._expression, value)
+            if key in CONSTANT_ATTRIBUTES:
+                value = self.constants.get(value, value)
+            node.set(key, value)
+
+        text = _text(node)
+        if text is not None:
+            text = VAR_REFERENCE.sub(self._variable, text)
+            if node.tag in EXPRESSION_NODES:
+                text = EXP_REFERENCE.sub(self._expression, text)
+            if node.tag in CONSTANT_NODES:
+                text = self.constants.get(text, text)
+            node.text = text
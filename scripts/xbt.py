@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Kodi XBT texture bundle support for StreamFlix
+Reads and writes the XBTF (version 2) format Kodi loads from media/Textures.xbt.
+"""
+
+import struct
+import zlib
+from pathlib import Path
+
+try:
+    import lzo  # python-lzo, only needed for compressed bundles
+except ImportError:
+    lzo = None
+
+LZO_AVAILABLE = lzo is not None
+
+XBTF_MAGIC = b'XBTF'
+XBTF_VERSION = b'2'
+XBTF_PATH_SIZE = 256
+
+# Kodi texture formats (guilib/TextureFormats.h)
+XB_FMT_A8R8G8B8 = 16
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Channels per PNG colour type (greyscale, rgb, palette, grey+alpha, rgba)
+PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+
+class XBTError(Exception):
+    pass
+
+
+class XBTFrame:
+    def __init__(self, width, height, fmt, packed_size, unpacked_size, duration=0, offset=0):
+        self.width = width
+        self.height = height
+        self.format = fmt
+        self.packed_size = packed_size
+        self.unpacked_size = unpacked_size
+        self.duration = duration
+        self.offset = offset
+
+    @property
+    def is_packed(self):
+        return self.packed_size != self.unpacked_size
+
+
+class XBTFile:
+    def __init__(self, path, frames, loop=0):
+        self.path = path
+        self.frames = frames
+        self.loop = loop
+
+
+def normalize_texture_path(path):
+    """Normalise a texture path the way Kodi looks it up in a bundle."""
+    return str(path).replace('\\', '/').lstrip('/').lower()
+
+
+def unfilter_scanlines(raw, width, height, bpp):
+    """Undo PNG per-scanline filtering, returning the raw pixel bytes."""
+    stride = width * bpp
+    out = bytearray(stride * height)
+    prev = bytearray(stride)
+    pos = 0
+
+    for y in range(height):
+        filter_type = raw[pos]
+        line = bytearray(raw[pos + 1:pos + 1 + stride])
+        pos += stride + 1
+
+        if filter_type == 1:  # Sub
+            for i in range(bpp, stride):
+                line[i] = (line[i] + line[i - bpp]) & 0xFF
+        elif filter_type == 2:  # Up
+            for i in range(stride):
+                line[i] = (line[i] + prev[i]) & 0xFF
+        elif filter_type == 3:  # Average
+            for i in range(stride):
+                left = line[i - bpp] if i >= bpp else 0
+                line[i] = (line[i] + ((left + prev[i]) >> 1)) & 0xFF
+        elif filter_type == 4:  # Paeth
+            for i in range(stride):
+                a = line[i - bpp] if i >= bpp else 0
+                b = prev[i]
+                c = prev[i - bpp] if i >= bpp else 0
+                p = a + b - c
+                pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+                if pa <= pb and pa <= pc:
+                    pred = a
+                elif pb <= pc:
+                    pred = b
+                else:
+                    pred = c
+                line[i] = (line[i] + pred) & 0xFF
+        elif filter_type != 0:
+            raise XBTError(f"Unknown PNG filter type {filter_type}")
+
+        out[y * stride:(y + 1) * stride] = line
+        prev = line
+
+    return out
+
+
+def _decode_png(data):
+    if not data.startswith(PNG_SIGNATURE):
+        raise XBTError("Not a PNG file")
+
+    pos = len(PNG_SIGNATURE)
+    header = None
+    palette = b''
+    transparency = b''
+    idat = []
+
+    while pos < len(data):
+        length, chunk_type = struct.unpack('>I4s', data[pos:pos + 8])
+        chunk = data[pos + 8:pos + 8 + length]
+        pos += length + 12
+
+        if chunk_type == b'IHDR':
+            header = struct.unpack('>IIBBBBB', chunk)
+        elif chunk_type == b'PLTE':
+            palette = chunk
+        elif chunk_type == b'tRNS':
+            transparency = chunk
+        elif chunk_type == b'IDAT':
+            idat.append(chunk)
+        elif chunk_type == b'IEND':
+            break
+
+    if header is None:
+        raise XBTError("PNG has no IHDR chunk")
+
+    width, height, bit_depth, colour_type, _, _, interlace = header
+    if bit_depth != 8 or interlace != 0 or colour_type not in PNG_CHANNELS:
+        raise XBTError(
+            f"Unsupported PNG (bit depth {bit_depth}, colour type {colour_type}, interlace {interlace})"
+        )
+
+    channels = PNG_CHANNELS[colour_type]
+    raw = zlib.decompress(b''.join(idat))
+    expected = height * (width * channels + 1)
+    if len(raw) != expected:
+        raise XBTError(f"PNG image data is {len(raw)} bytes, expected {expected}")
+    pixels = unfilter_scanlines(raw, width, height, channels)
+
+    bgra = bytearray(width * height * 4)
+    for i in range(width * height):
+        px = pixels[i * channels:(i + 1) * channels]
+        if colour_type == 6:
+            r, g, b, a = px
+        elif colour_type == 2:
+            r, g, b = px
+            a = 255
+        elif colour_type == 0:
+            r = g = b = px[0]
+            a = 255
+        elif colour_type == 4:
+            r = g = b = px[0]
+            a = px[1]
+        else:  # Palette
+            index = px[0]
+            r, g, b = palette[index * 3:index * 3 + 3]
+            a = transparency[index] if index < len(transparency) else 255
+        bgra[i * 4:i * 4 + 4] = bytes((b, g, r, a))
+
+    return width, height, bytes(bgra)
+
+
+def decode_png(data):
+    """Decode an 8-bit, non-interlaced PNG into (width, height, BGRA bytes).
+
+    Any problem with the file, including truncation or corruption, raises
+    XBTError.
+    """
+    try:
+        return _decode_png(data)
+    except XBTError:
+        raise
+    except (zlib.error, struct.error, IndexError, ValueError) as e:
+        raise XBTError(f"Corrupt PNG: {e}") from e
+
+
+def build_frame_data(pixels, compress=False):
+    """Convert decoded BGRA pixels into XBT frame payload.
+
+    The payload is LZO compressed only when requested and only if that
+    makes it smaller, mirroring Kodi's TexturePacker.
+    """
+    payload = pixels
+
+    if compress:
+        if lzo is None:
+            raise XBTError("Texture compression requires python-lzo (pip install python-lzo)")
+        # Kodi expects a bare LZO1X stream without python-lzo's 5 byte header
+        packed = lzo.compress(pixels, 1, False)
+        if len(packed) < len(pixels):
+            payload = packed
+
+    return payload
+
+
+def write_xbt(output, textures, compress=False):
+    """Write a texture bundle.
+
+    textures maps bundle paths (relative to media/) to decoded
+    (width, height, BGRA bytes) images, as returned by decode_png.
+    compress is either a bool or a callable taking the bundle path, so
+    compression can be chosen per texture. Returns the list of XBTFile
+    entries written.
+    """
+    should_compress = compress if callable(compress) else (lambda _path: compress)
+
+    entries = []
+    payloads = []
+    for path in sorted(textures, key=normalize_texture_path):
+        name = normalize_texture_path(path)
+        encoded = name.encode('utf-8')
+        if len(encoded) >= XBTF_PATH_SIZE:
+            raise XBTError(f"Texture path too long for XBT bundle: {name}")
+
+        width, height, pixels = textures[path]
+        payload = build_frame_data(pixels, should_compress(name))
+        frame = XBTFrame(width, height, XB_FMT_A8R8G8B8, len(payload), len(pixels))
+        entries.append(XBTFile(name, [frame]))
+        payloads.append(payload)
+
+    # Header (magic, version, file count) then one fixed-size record per file
+    header_size = len(XBTF_MAGIC) + len(XBTF_VERSION) + 4
+    for entry in entries:
+        header_size += XBTF_PATH_SIZE + 8 + len(entry.frames) * 40
+
+    offset = header_size
+    for entry in entries:
+        for frame in entry.frames:
+            frame.offset = offset
+            offset += frame.packed_size
+
+    with open(output, 'wb') as f:
+        f.write(XBTF_MAGIC)
+        f.write(XBTF_VERSION)
+        f.write(struct.pack('<I', len(entries)))
+        for entry in entries:
+            f.write(entry.path.encode('utf-8').ljust(XBTF_PATH_SIZE, b'\0'))
+            f.write(struct.pack('<II', entry.loop, len(entry.frames)))
+            for frame in entry.frames:
+                f.write(struct.pack(
+                    '<IIIQQIQ',
+                    frame.width, frame.height, frame.format,
+                    frame.packed_size, frame.unpacked_size,
+                    frame.duration, frame.offset,
+                ))
+        for payload in payloads:
+            f.write(payload)
+
+    return entries
+
+
+def read_xbt_index(f):
+    """Read the bundle index from an open file, returning {path: XBTFile}."""
+    if f.read(4) != XBTF_MAGIC:
+        raise XBTError("Not an XBT bundle")
+    if f.read(1) != XBTF_VERSION:
+        raise XBTError("Unsupported XBT version")
+
+    (count,) = struct.unpack('<I', f.read(4))
+    files = {}
+    for _ in range(count):
+        path = f.read(XBTF_PATH_SIZE).split(b'\0', 1)[0].decode('utf-8')
+        loop, frame_count = struct.unpack('<II', f.read(8))
+        frames = [XBTFrame(*struct.unpack('<IIIQQIQ', f.read(40))) for _ in range(frame_count)]
+        files[path] = XBTFile(path, frames, loop)
+
+    return files
+
+
+def read_xbt(path):
+    """Read the index of an XBT bundle on disk."""
+    with open(Path(path), 'rb') as f:
+        return read_xbt_index(f)
@@ -1,33 +1,85 @@
 import xbmc
 import xbmcvfs
 import xbmcaddon
+import hashlib
 import os
+import time
+
+KEYMAP_FILE = 'streamflix.xml'
+
+# Hidden addon settings (resources/settings.xml)
+SETTING_KEYMAP_HASH = 'keymap_hash'
+SETTING_KEYMAP_VERSION = 'keymap_version'
+
+def read_file(path):
+    """Read a file through xbmcvfs, returning None if it is missing or empty."""
+    try:
+        with xbmcvfs.File(path) as f:
+            return bytes(f.readBytes()) or None
+    except OSError:
+        return None
+
+def replace_keymap(dest, data):
+    """Replace dest with data via a temp file so Kodi never reads a partial keymap.
+
+    Returns False, with the temp file removed, if the keymap couldn't be written.
+    """
+    tmp = dest + '.tmp'
+    try:
+        with xbmcvfs.File(tmp, 'w') as f:
+            written = f.write(data)
+        if written and xbmcvfs.rename(tmp, dest):
+            return True
+        error = 'write failed'
+    except OSError as e:
+        error = e
+    xbmcvfs.delete(tmp)
+    xbmc.log(f'StreamFlix: Could not install keymap to {dest}: {error}', xbmc.LOGERROR)
+    return False
 
 def install_keymap():
-    """Install the StreamFlix keymap to userdata if not already present."""
+    """Install or update the StreamFlix keymap in userdata.
+
+    The installed keymap's hash and the addon version it came from are kept
+    in addon settings. While the version is unchanged the shipped keymap
+    can't have changed either, so startup returns without touching the
+    filesystem. After an update the keymap is only rewritten, and keymaps
+    only reloaded, if its content changed or the installed copy is missing.
+
+    So a deleted userdata/keymaps/streamflix.xml is only restored, and
+    edits to keymap.xml only picked up, once the addon version changes.
+    If writing the keymap fails nothing is saved and the next start retries.
+    """
+    start = time.perf_counter()
     addon = xbmcaddon.Addon()
-    addon_path = addon.getAddonInfo('path')
+    version = addon.getAddonInfo('version')
+
+    if addon.getSetting(SETTING_KEYMAP_VERSION) == version:
+        xbmc.log(f'StreamFlix: Keymap up to date ({(time.perf_counter() - start) * 1000:.2f} ms)', xbmc.LOGDEBUG)
+        return
 
     # Source keymap in addon
-    source = os.path.join(addon_path, 'resources', 'keymaps', 'keymap.xml')
+    source = os.path.join(addon.getAddonInfo('path'), 'resources', 'keymaps', 'keymap.xml')
+    data = read_file(source)
+    if data is None:
+        xbmc.log(f'StreamFlix: Keymap not found at {source}', xbmc.LOGWARNING)
+        return
 
     # Destination in userdata
-    userdata = xbmcvfs.translatePath('special://userdata/')
-    keymaps_dir = os.path.join(userdata, 'keymaps')
-    dest = os.path.join(keymaps_dir, 'streamflix.xml')
+    keymaps_dir = os.path.join(xbmcvfs.translatePath('special://userdata/'), 'keymaps')
+    dest = os.path.join(keymaps_dir, KEYMAP_FILE)
+    digest = hashlib.sha256(data).hexdigest()
 
-    # Create keymaps directory if it doesn't exist
-    if not xbmcvfs.exists(keymaps_dir):
+    if digest != addon.getSetting(SETTING_KEYMAP_HASH) or not xbmcvfs.exists(dest):
         xbmcvfs.mkdirs(keymaps_dir)
-
-    # Copy keymap if source exists and destination doesn't
-    if xbmcvfs.exists(source) and not xbmcvfs.exists(dest):
-        xbmcvfs.copy(source, dest)
-        xbmc.log('StreamFlix: Installed keymap to userdata', xbmc.LOGINFO)
-        # Reload keymaps
+        if not replace_keymap(dest, data):
+            return
+        addon.setSetting(SETTING_KEYMAP_HASH, digest)
         xbmc.executebuiltin('Action(reloadkeymaps)')
-    elif xbmcvfs.exists(source):
-        xbmc.log('StreamFlix: Keymap already installed', xbmc.LOGDEBUG)
+        xbmc.log('StreamFlix: Installed keymap to userdata', xbmc.LOGINFO)
+
+    addon.setSetting(SETTING_KEYMAP_VERSION, version)
+    xbmc.log(f'StreamFlix: Keymap check took {(time.perf_counter() - start) * 1000:.2f} ms', xbmc.LOGINFO)
 
 if __name__ == '__main__':
     install_keymap()
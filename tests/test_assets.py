@@ -0,0 +1,160 @@
+import struct
+import sys
+import zlib
+from pathlib import Path
+
+import pytest
+
+SKIN_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SKIN_DIR / 'scripts'))
+
+import assets  # noqa: E402
+import xbt  # noqa: E402
+
+MEDIA_DIR = SKIN_DIR / 'media'
+PNG = (MEDIA_DIR / 'white.png').read_bytes()
+OTHER_PNG = (MEDIA_DIR / 'black.png').read_bytes()
+
+
+@pytest.fixture
+def skin(tmp_path):
+    """A staged skin with two copies of one texture, referenced several ways."""
+    media = tmp_path / 'media'
+    (media / 'Icons').mkdir(parents=True)
+    (media / 'Icons' / 'Play.png').write_bytes(PNG)
+    (media / 'play-copy.png').write_bytes(PNG)
+    (media / 'other.png').write_bytes(OTHER_PNG)
+    (media / 'unused.png').write_bytes(OTHER_PNG + b'\0')
+
+    xml = tmp_path / 'xml'
+    xml.mkdir()
+    (xml / 'Home.xml').write_text("""<window>
+    <texture>icons/play.png</texture>
+    <texture> Icons/Play.png </texture>
+    <control><texturefocus>other.png</texturefocus></control>
+</window>""", encoding='utf-8')
+    (xml / 'Video.xml').write_text("<window><texture>icons/play.png</texture></window>", encoding='utf-8')
+    (xml / 'Dialog.xml').write_text("""<window>
+    <texture>play-copy.png</texture>
+    <texture border="2">PLAY-COPY.PNG</texture>
+    <control icon='play-copy.png' alt="play-copy.png"/>
+</window>""", encoding='utf-8')
+    return tmp_path
+
+
+def test_dedupe_rewrites_every_reference(skin):
+    media, xml = skin / 'media', skin / 'xml'
+    report = assets.OptimizeReport()
+    references = assets.dedupe_textures(media, xml, assets.collect_texture_references(xml), report)
+
+    assert report.duplicates == {'play-copy.png': 'icons/play.png'}
+    assert report.bytes_saved['duplicates'] == len(PNG)
+    assert not (media / 'play-copy.png').exists()
+    assert (media / 'Icons' / 'Play.png').exists()
+    assert references == {'icons/play.png': {'Home.xml', 'Video.xml', 'Dialog.xml'}, 'other.png': {'Home.xml'}}
+
+    # Rewritten with the case used on disk, in text and both quote styles
+    dialog = (xml / 'Dialog.xml').read_text(encoding='utf-8')
+    assert 'play-copy' not in dialog.lower()
+    assert dialog.count('Icons/Play.png') == 4
+    assert "icon='Icons/Play.png'" in dialog
+
+
+def test_dedupe_keeps_files_when_a_reference_cant_be_rewritten(skin):
+    media, xml = skin / 'media', skin / 'xml'
+    dialog = xml / 'Dialog.xml'
+    dialog.write_text(dialog.read_text(encoding='utf-8').replace(
+        '</window>', '<texture>play-copy&#46;png</texture></window>'), encoding='utf-8')
+    report = assets.OptimizeReport()
+
+    with pytest.raises(assets.AssetError, match=r'play-copy\.png \(in Dialog\.xml\)'):
+        assets.dedupe_textures(media, xml, assets.collect_texture_references(xml), report)
+    assert (media / 'play-copy.png').exists()
+    assert report.duplicates == {}
+
+
+def test_remove_unreferenced_textures(skin):
+    media, xml = skin / 'media', skin / 'xml'
+    report = assets.OptimizeReport()
+    (media / 'Empty').mkdir()
+    (media / 'Empty' / 'gone.png').write_bytes(PNG)
+
+    assets.remove_unreferenced_textures(media, assets.collect_texture_references(xml), report)
+    assert sorted(report.removed_textures) == ['empty/gone.png', 'unused.png']
+    assert sorted(assets.find_media_files(media)) == ['icons/play.png', 'other.png', 'play-copy.png']
+    assert not (media / 'Empty').exists()
+
+
+def test_optimize_skin(skin):
+    report, references = assets.optimize_skin(skin, skin / 'xml')
+    assert sorted(references) == ['icons/play.png', 'other.png']
+    assert sorted(assets.find_media_files(skin / 'media')) == ['icons/play.png', 'other.png']
+    assert report.total_saved > 0
+
+
+def test_dedupe_fonts(tmp_path):
+    (tmp_path / 'fonts').mkdir()
+    (tmp_path / 'fonts' / 'Sans.ttf').write_bytes(b'sans')
+    (tmp_path / 'extras' / 'fonts').mkdir(parents=True)
+    (tmp_path / 'extras' / 'fonts' / 'sans-copy.TTF').write_bytes(b'sans')
+    (tmp_path / 'extras' / 'Other.ttf').write_bytes(b'other')
+    report = assets.OptimizeReport()
+
+    assets.dedupe_fonts(tmp_path, report)
+    assert report.duplicate_fonts == {'extras/fonts/sans-copy.TTF': 'fonts/Sans.ttf'}
+    assert report.bytes_saved['font_duplicates'] == 4
+    assert not (tmp_path / 'extras' / 'fonts').exists()
+    assert (tmp_path / 'extras' / 'Other.ttf').exists()
+    assert (tmp_path / 'fonts' / 'Sans.ttf').exists()
+
+
+def test_remove_unreferenced_fonts(tmp_path):
+    xml = tmp_path / 'xml'
+    xml.mkdir()
+    (xml / 'Font.xml').write_text(
+        "<fonts><fontset><font><filename> Sans.TTF </filename></font></fontset></fonts>", encoding='utf-8')
+    fonts = tmp_path / 'fonts'
+    fonts.mkdir()
+    (fonts / 'sans.ttf').write_bytes(b'sans')
+    (fonts / 'Unused.otf').write_bytes(b'unused')
+    report = assets.OptimizeReport()
+
+    assets.remove_unreferenced_fonts(fonts, assets.collect_font_references(xml), report)
+    assert report.removed_fonts == ['Unused.otf']
+    assert [path.name for path in fonts.iterdir()] == ['sans.ttf']
+
+
+@pytest.mark.parametrize('path', sorted(MEDIA_DIR.rglob('*.png')), ids=lambda path: path.name)
+def test_recompress_is_lossless(path):
+    data = path.read_bytes()
+    result = assets.recompress_png(data)
+    assert len(result) <= len(data)
+    assert xbt.decode_png(result) == xbt.decode_png(data)
+
+
+def test_recompress_drops_metadata():
+    iend = PNG.index(b'IEND') - 4
+    text = b'Comment\0' + b'x' * 200
+    chunk = struct.pack('>I', len(text)) + b'tEXt' + text + struct.pack('>I', zlib.crc32(b'tEXt' + text))
+    result = assets.recompress_png(PNG[:iend] + chunk + PNG[iend:])
+    assert b'tEXt' not in result
+    assert xbt.decode_png(result) == xbt.decode_png(PNG)
+
+
+def test_recompress_keeps_png_without_iend():
+    data = (MEDIA_DIR / 'gradient-bottom.png').read_bytes()
+    truncated = data[:data.index(b'IEND') - 4]
+    assert assets.recompress_png(truncated) == truncated
+
+
+def test_recompress_pngs_skips_corrupt_files(tmp_path, capsys):
+    data = bytearray(PNG)
+    start = data.index(b'IDAT') + 4
+    data[start:start + 4] = b'\xff' * 4
+    (tmp_path / 'broken.png').write_bytes(bytes(data))
+    report = assets.OptimizeReport()
+
+    assets.recompress_pngs(tmp_path, report)
+    assert (tmp_path / 'broken.png').read_bytes() == bytes(data)
+    assert report.recompressed == []
+    assert 'broken.png' in capsys.readouterr().out
@@ -0,0 +1,278 @@
+import shutil
+import sys
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import pytest
+
+SKIN_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SKIN_DIR / 'scripts'))
+
+import flatten_xml  # noqa: E402
+import kodi_includes  # noqa: E402
+
+XML_DIR = SKIN_DIR / 'resources' / 'skins' / 'Default' / '1080p'
+
+INCLUDES = """
+<includes>
+    <include file="Extra.xml"/>
+    <constant name="RowHeight">240</constant>
+    <expression name="IsPlaying">Player.HasVideo + !Player.Paused</expression>
+    <variable name="Static"><value>static.png</value></variable>
+    <variable name="Dynamic">
+        <value condition="Player.HasVideo">a.png</value>
+        <value>b.png</value>
+    </variable>
+
+    <include name="Label">
+        <param name="text" default="Untitled"/>
+        <param name="colour">white</param>
+        <param name="id"/>
+        <param name="text" default="Ignored"/>
+        <definition>
+            <control type="label" id="$PARAM[id]">
+                <label>$PARAM[text]</label>
+                <textcolor>$PARAM[colour]</textcolor>
+                <description>$PARAM[id]</description>
+                <font>$PARAM[font]</font>
+            </control>
+        </definition>
+    </include>
+
+    <include name="Row">
+        <param name="posy">0</param>
+        <height>RowHeight</height>
+        <posy>$PARAM[posy]</posy>
+    </include>
+
+    <include name="Titled">
+        <param name="title"/>
+        <definition>
+            <include content="Label">
+                <param name="text">Row: $PARAM[title]</param>
+                <param name="colour" value="$PARAM[colour]"/>
+                <param name="id">$PARAM[title]</param>
+            </include>
+        </definition>
+    </include>
+
+    <include name="Wrapper">
+        <definition><control type="group"><nested/></control></definition>
+    </include>
+
+    <include name="Poster"><texture>shadowed.png</texture></include>
+    <include name="Empty"></include>
+    <include name="Loop"><include>Loop</include></include>
+</includes>
+"""
+
+EXTRA = """
+<includes>
+    <include name="Poster">
+        <texture>$VAR[Static]</texture>
+        <fallback>$VAR[Dynamic]</fallback>
+        <visible>$EXP[IsPlaying]</visible>
+        <label>$EXP[IsPlaying]</label>
+        <animation effect="fade" time="RowHeight" condition="$EXP[IsPlaying]">Focus</animation>
+    </include>
+</includes>
+"""
+
+
+@pytest.fixture
+def xml_dir(tmp_path):
+    (tmp_path / 'Includes.xml').write_text(INCLUDES, encoding='utf-8')
+    (tmp_path / 'Extra.xml').write_text(EXTRA, encoding='utf-8')
+    return tmp_path
+
+
+def flatten(xml_dir):
+    includes = flatten_xml.Includes.load(xml_dir)
+    return lambda root: flatten_xml.flatten_window(root, includes)[0]
+
+
+def kodi(xml_dir):
+    return kodi_includes.KodiIncludes(xml_dir).resolve_window
+
+
+# Both must produce the window Kodi sees after loading it
+def resolvers():
+    return [
+        pytest.param(flatten, flatten_xml.FlattenError, id='flatten_window'),
+        pytest.param(kodi, kodi_includes.IncludeError, id='kodi_includes'),
+    ]
+
+
+def resolve(resolver, xml_dir, window):
+    return resolver(xml_dir)(ET.fromstring(window))
+
+
+def assert_same(expected, actual):
+    assert flatten_xml.structural_diff(ET.fromstring(expected), actual) == []
+
+
+@pytest.mark.parametrize('resolver, error', resolvers())
+def test_definition_defaults_and_call_params(xml_dir, resolver, error):
+    # A bare <param name="id"/> defaults to empty; an unknown param is empty
+    actual = resolve(resolver, xml_dir, """
+        <window><controls>
+            <include>Label</include>
+            <include content="Label">
+                <param name="text" value="Hello"/>
+                <param name="colour">red</param>
+                <param name="id" value="7"/>
+                <param name="id" value="8"/>
+            </include>
+        </controls></window>""")
+    assert_same("""
+        <window><controls>
+            <control type="label" id="">
+                <label>Untitled</label>
+                <textcolor>white</textcolor>
+                <description></description>
+                <font></font>
+            </control>
+            <control type="label" id="7">
+                <label>Hello</label>
+                <textcolor>red</textcolor>
+                <description>7</description>
+                <font></font>
+            </control>
+        </controls></window>""", actual)
+
+
+@pytest.mark.parametrize('resolver, error', resolvers())
+def test_text_form_call_passes_no_params(xml_dir, resolver, error):
+    actual = resolve(resolver, xml_dir, """
+        <window><include>Label<param name="text" value="Hello"/></include></window>""")
+    assert_same("""
+        <window>
+            <control type="label" id="">
+                <label>Untitled</label>
+                <textcolor>white</textcolor>
+                <description></description>
+                <font></font>
+            </control>
+        </window>""", actual)
+
+
+@pytest.mark.parametrize('resolver, error', resolvers())
+def test_include_without_definition_has_no_defaults(xml_dir, resolver, error):
+    # Its <param> is part of the body, not a default for $PARAM[posy]
+    actual = resolve(resolver, xml_dir, """
+        <window>
+            <control type="group"><include>Row</include></control>
+            <control type="group">
+                <include content="Row"><param name="posy" value="10"/></include>
+            </control>
+        </window>""")
+    assert_same("""
+        <window>
+            <control type="group">
+                <param name="posy">0</param>
+                <height>240</height>
+                <posy></posy>
+            </control>
+            <control type="group">
+                <param name="posy">0</param>
+                <height>240</height>
+                <posy>10</posy>
+            </control>
+        </window>""", actual)
+
+
+@pytest.mark.parametrize('resolver, error', resolvers())
+def test_forwarded_undefined_param_is_dropped(xml_dir, resolver, error):
+    # Titled doesn't define colour, so Label's default applies; its bare
+    # title param is defined (empty), so Label's id is set to ''
+    actual = resolve(resolver, xml_dir, """
+        <window>
+            <include>Titled</include>
+            <include content="Titled">
+                <param name="title" value="Movies"/>
+                <param name="colour" value="red"/>
+            </include>
+        </window>""")
+    assert_same("""
+        <window>
+            <control type="label" id="">
+                <label>Row:</label>
+                <textcolor>white</textcolor>
+                <description></description>
+                <font></font>
+            </control>
+            <control type="label" id="Movies">
+                <label>Row: Movies</label>
+                <textcolor>red</textcolor>
+                <description>Movies</description>
+                <font></font>
+            </control>
+        </window>""", actual)
+
+
+@pytest.mark.parametrize('resolver, error', resolvers())
+def test_first_definition_wins_and_values_are_resolved(xml_dir, resolver, error):
+    # Poster from Extra.xml is loaded before the one in Includes.xml;
+    # $EXP is only resolved in condition tags and attributes
+    actual = resolve(resolver, xml_dir, """
+        <window>
+            <width>RowHeight</width>
+            <label>RowHeight</label>
+            <include>Poster</include>
+        </window>""")
+    assert_same("""
+        <window>
+            <width>240</width>
+            <label>RowHeight</label>
+            <texture>static.png</texture>
+            <fallback>$VAR[Dynamic]</fallback>
+            <visible>[Player.HasVideo + !Player.Paused]</visible>
+            <label>$EXP[IsPlaying]</label>
+            <animation effect="fade" time="240" condition="[Player.HasVideo + !Player.Paused]">Focus</animation>
+        </window>""", actual)
+
+
+@pytest.mark.parametrize('resolver, error', resolvers())
+def test_includes_left_for_kodi(xml_dir, resolver, error):
+    window = """
+        <window>
+            <include condition="Skin.HasSetting(Compact)">Label</include>
+            <include file="Other.xml">Label</include>
+            <include content="Wrapper"><control type="image"/></include>
+        </window>"""
+    assert_same(window, resolve(resolver, xml_dir, window))
+
+
+@pytest.mark.parametrize('resolver, error', resolvers())
+@pytest.mark.parametrize('call', ['Missing', 'Empty', 'Loop'])
+def test_unresolvable_includes_raise(xml_dir, resolver, error, call):
+    with pytest.raises(error):
+        resolve(resolver, xml_dir, f"<window><include>{call}</include></window>")
+
+
+def test_minify_keeps_text():
+    root = ET.fromstring("<window>\n    <label> Hi </label>\n    <control/>\n</window>")
+    assert ET.tostring(flatten_xml.minify(root)) == b"<window><label> Hi </label><control /></window>"
+
+
+def skin_windows():
+    for path in sorted(XML_DIR.glob('*.xml')):
+        if ET.parse(path).getroot().tag == 'window':
+            yield pytest.param(path, id=path.name)
+
+
+@pytest.mark.parametrize('path', list(skin_windows()))
+def test_skin_windows_look_the_same_to_kodi(path):
+    root = ET.parse(path).getroot()
+    flattened, _ = flatten_xml.flatten_window(root, flatten_xml.Includes.load(XML_DIR))
+    kodi = kodi_includes.KodiIncludes(XML_DIR)
+    assert flatten_xml.structural_diff(kodi.resolve_window(root), kodi.resolve_window(flattened)) == []
+
+
+def test_flatten_skin(tmp_path):
+    xml_dir = tmp_path / 'xml'
+    shutil.copytree(XML_DIR, xml_dir)
+    results = flatten_xml.flatten_skin(xml_dir)
+    assert len(results) == len(list(XML_DIR.glob('*.xml')))
+    assert sum(expanded for _, _, _, expanded in results) > 0
+    assert sum(after for _, _, after, _ in results) < sum(before for _, before, _, _ in results)
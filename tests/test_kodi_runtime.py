@@ -0,0 +1,119 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+SKIN_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SKIN_DIR / 'scripts' / 'fake_kodi'))
+
+import kodi_runtime  # noqa: E402
+
+
+@pytest.fixture
+def clock():
+    clock = kodi_runtime.VirtualClock(quiescence_timeout=2.0)
+    yield clock
+    clock.abort()
+
+
+def run(clock, target):
+    thread = clock.Thread(target=target, daemon=True)
+    thread.start()
+    clock.advance(0)
+    return thread
+
+
+def test_untracked_sleep_raises(clock):
+    with pytest.raises(kodi_runtime.SimulationError):
+        clock.sleep(1)
+    with pytest.raises(kodi_runtime.SimulationError):
+        clock.Event().wait(1)
+
+
+def test_sleep_wakes_when_advanced(clock):
+    woke = []
+
+    def sleeper():
+        for _ in range(3):
+            clock.sleep(1.0)
+            woke.append(clock.time())
+
+    thread = run(clock, sleeper)
+    clock.advance(0.5)
+    assert woke == []
+    clock.advance(0.5)
+    assert woke == [1.0]
+    clock.advance(2.0)
+    assert woke == [1.0, 3.0]
+    clock.advance(1.0)
+    thread.join(1)
+    assert not thread.is_alive()
+    assert woke == [1.0, 3.0, 4.0]
+    assert clock.wakeups == 3
+    assert clock.threads_started == 1
+
+
+def test_event_wait(clock):
+    event = clock.Event()
+    results = []
+    run(clock, lambda: results.append(event.wait(5)))
+    run(clock, lambda: results.append(event.wait(1)))
+
+    clock.advance(1)
+    assert results == [False]
+    assert clock.wakeups == 1
+
+    event.set()
+    clock.advance(0)
+    assert results == [False, True]
+    # Woken by set(), not by its timeout
+    assert clock.wakeups == 1
+    assert event.wait(0) is True
+
+
+def test_timer_fires_and_counts_a_wakeup(clock):
+    fired = []
+    timer = clock.Timer(2.0, fired.append, args=['late'])
+    cancelled = clock.Timer(2.0, fired.append, args=['cancelled'])
+    timer.start()
+    cancelled.start()
+    clock.advance(1)
+    cancelled.cancel()
+    clock.advance(0)
+    assert fired == []
+
+    clock.advance(1)
+    assert fired == ['late']
+    assert clock.wakeups == 1
+    assert clock.threads_started == 2
+
+
+def test_spend_moves_time_inside_a_thread(clock):
+    times = []
+
+    def worker():
+        clock.spend(0.25)
+        times.append(clock.time())
+
+    run(clock, worker)
+    assert times == [0.25]
+    assert clock.wakeups == 0
+
+
+def test_abort_releases_sleepers(clock):
+    thread = run(clock, lambda: clock.sleep(60))
+    clock.abort()
+    thread.join(1)
+    assert not thread.is_alive()
+    assert clock.wakeups == 0
+
+
+def test_threading_module(clock):
+    threading = clock.threading_module()
+    assert threading.Thread is clock.Thread
+    assert threading.Event is clock.Event
+    assert threading.Timer is clock.Timer
+    assert threading.Lock is not None
+    for name in ('Condition', 'Semaphore', 'BoundedSemaphore', 'Barrier'):
+        with pytest.raises(kodi_runtime.SimulationError):
+            getattr(threading, name)()
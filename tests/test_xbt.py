@@ -0,0 +1,192 @@
+import struct
+import sys
+import zlib
+from pathlib import Path
+
+import pytest
+
+SKIN_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SKIN_DIR / 'scripts'))
+
+import xbt  # noqa: E402
+
+MEDIA_DIR = SKIN_DIR / 'media'
+
+
+def chunk(chunk_type, data):
+    return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', zlib.crc32(chunk_type + data))
+
+
+def paeth(a, b, c):
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    return b if pb <= pc else c
+
+
+def filter_line(filter_type, line, prev, bpp):
+    out = bytearray()
+    for i, value in enumerate(line):
+        a = line[i - bpp] if i >= bpp else 0
+        b = prev[i]
+        c = prev[i - bpp] if i >= bpp else 0
+        predictor = [0, a, b, (a + b) >> 1, paeth(a, b, c)][filter_type]
+        out.append((value - predictor) & 0xFF)
+    return bytes(out)
+
+
+def make_png(width, height, colour_type, rows, filters=(0,), extra_chunks=(), palette=None, transparency=None):
+    """Encode rows of raw pixel bytes, cycling through the given scanline filters."""
+    bpp = xbt.PNG_CHANNELS[colour_type]
+    raw = b''
+    prev = bytes(width * bpp)
+    for y, line in enumerate(rows):
+        filter_type = filters[y % len(filters)]
+        raw += bytes([filter_type]) + filter_line(filter_type, line, prev, bpp)
+        prev = line
+
+    data = xbt.PNG_SIGNATURE + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, colour_type, 0, 0, 0))
+    for chunk_type, content in extra_chunks:
+        data += chunk(chunk_type, content)
+    if palette is not None:
+        data += chunk(b'PLTE', palette)
+    if transparency is not None:
+        data += chunk(b'tRNS', transparency)
+    return data + chunk(b'IDAT', zlib.compress(raw)) + chunk(b'IEND', b'')
+
+
+RGBA_ROWS = [
+    bytes([10, 20, 30, 255, 40, 50, 60, 128, 70, 80, 90, 0]),
+    bytes([15, 25, 35, 255, 200, 210, 220, 64, 5, 250, 5, 32]),
+    bytes([0, 0, 0, 0, 255, 255, 255, 255, 128, 64, 32, 16]),
+]
+RGBA_BGRA = bytes(
+    value for row in RGBA_ROWS for i in range(0, len(row), 4) for value in (row[i + 2], row[i + 1], row[i], row[i + 3])
+)
+
+
+@pytest.mark.parametrize('filters', [(0,), (1,), (2,), (3,), (4,), (0, 1, 2, 3, 4)])
+def test_decode_rgba_with_each_filter(filters):
+    data = make_png(3, 3, 6, RGBA_ROWS, filters)
+    assert xbt.decode_png(data) == (3, 3, RGBA_BGRA)
+
+
+def test_decode_rgb_grey_and_grey_alpha():
+    assert xbt.decode_png(make_png(2, 1, 2, [bytes([1, 2, 3, 4, 5, 6])], (4,))) == (
+        2, 1, bytes([3, 2, 1, 255, 6, 5, 4, 255]))
+    assert xbt.decode_png(make_png(2, 1, 0, [bytes([7, 9])], (1,))) == (
+        2, 1, bytes([7, 7, 7, 255, 9, 9, 9, 255]))
+    assert xbt.decode_png(make_png(1, 1, 4, [bytes([7, 100])])) == (1, 1, bytes([7, 7, 7, 100]))
+
+
+def test_decode_palette_with_transparency():
+    data = make_png(3, 1, 3, [bytes([0, 1, 2])], palette=bytes([255, 0, 0, 0, 255, 0, 0, 0, 255]),
+                    transparency=bytes([0, 128]))
+    assert xbt.decode_png(data) == (3, 1, bytes([0, 0, 255, 0, 0, 255, 0, 128, 255, 0, 0, 255]))
+
+
+def test_decode_skips_metadata_chunks():
+    data = make_png(3, 3, 6, RGBA_ROWS, extra_chunks=[(b'tEXt', b'Comment\0hello')])
+    assert xbt.decode_png(data) == (3, 3, RGBA_BGRA)
+
+
+@pytest.mark.parametrize('path', sorted(MEDIA_DIR.rglob('*.png')), ids=lambda path: path.name)
+def test_decode_skin_media(path):
+    width, height, pixels = xbt.decode_png(path.read_bytes())
+    assert len(pixels) == width * height * 4
+
+
+def corrupt_idat(data):
+    start = data.index(b'IDAT') + 4
+    return data[:start] + b'\xff' * 8 + data[start + 8:]
+
+
+@pytest.mark.parametrize('mangle', [
+    pytest.param(lambda data: b'GIF89a' + data[6:], id='not-png'),
+    pytest.param(lambda data: data[:len(xbt.PNG_SIGNATURE) + 10], id='truncated-header'),
+    pytest.param(lambda data: data[:data.index(b'IDAT') + 10], id='truncated-data'),
+    pytest.param(lambda data: data[:data.index(b'IHDR') - 4] + data[data.index(b'IHDR') + 21:], id='no-ihdr'),
+    pytest.param(corrupt_idat, id='corrupt-deflate'),
+])
+def test_decode_bad_png_raises(mangle):
+    with pytest.raises(xbt.XBTError):
+        xbt.decode_png(mangle(make_png(3, 3, 6, RGBA_ROWS)))
+
+
+def test_decode_unsupported_png_raises():
+    data = make_png(3, 3, 6, RGBA_ROWS)
+    sixteen_bit = data.replace(
+        chunk(b'IHDR', struct.pack('>IIBBBBB', 3, 3, 8, 6, 0, 0, 0)),
+        chunk(b'IHDR', struct.pack('>IIBBBBB', 3, 3, 16, 6, 0, 0, 0)))
+    with pytest.raises(xbt.XBTError, match='Unsupported'):
+        xbt.decode_png(sixteen_bit)
+
+
+def test_write_read_round_trip(tmp_path):
+    textures = {
+        'Icons/Play.png': (2, 1, bytes(range(8))),
+        'white.png': (1, 1, b'\xff' * 4),
+        'backgrounds\\dark.png': (1, 2, bytes(8)),
+    }
+    bundle = tmp_path / 'Textures.xbt'
+    written = xbt.write_xbt(bundle, textures)
+
+    index = xbt.read_xbt(bundle)
+    assert sorted(index) == ['backgrounds/dark.png', 'icons/play.png', 'white.png']
+    assert [entry.path for entry in written] == sorted(index)
+
+    data = bundle.read_bytes()
+    for name, original in (('icons/play.png', 'Icons/Play.png'), ('white.png', 'white.png'),
+                           ('backgrounds/dark.png', 'backgrounds\\dark.png')):
+        width, height, pixels = textures[original]
+        (frame,) = index[name].frames
+        assert (frame.width, frame.height, frame.format) == (width, height, xbt.XB_FMT_A8R8G8B8)
+        assert frame.packed_size == frame.unpacked_size == len(pixels)
+        assert not frame.is_packed
+        assert data[frame.offset:frame.offset + frame.packed_size] == pixels
+
+    last = max((frame for entry in index.values() for frame in entry.frames), key=lambda frame: frame.offset)
+    assert last.offset + last.packed_size == len(data)
+
+
+def test_read_index_leaves_file_at_first_payload(tmp_path):
+    bundle = tmp_path / 'Textures.xbt'
+    xbt.write_xbt(bundle, {'a.png': (1, 1, b'abcd'), 'b.png': (1, 1, b'efgh')})
+    with open(bundle, 'rb') as f:
+        index = xbt.read_xbt_index(f)
+        assert f.tell() == min(entry.frames[0].offset for entry in index.values())
+
+
+def test_read_rejects_other_files(tmp_path):
+    path = tmp_path / 'Textures.xbt'
+    path.write_bytes(b'PK\x03\x04')
+    with pytest.raises(xbt.XBTError):
+        xbt.read_xbt(path)
+
+
+def test_long_texture_path_raises(tmp_path):
+    with pytest.raises(xbt.XBTError, match='too long'):
+        xbt.write_xbt(tmp_path / 'Textures.xbt', {'a' * 300 + '.png': (1, 1, bytes(4))})
+
+
+@pytest.mark.skipif(xbt.LZO_AVAILABLE, reason='python-lzo is installed')
+def test_compress_without_lzo_raises(tmp_path):
+    with pytest.raises(xbt.XBTError, match='python-lzo'):
+        xbt.write_xbt(tmp_path / 'Textures.xbt', {'a.png': (1, 1, bytes(4))}, compress=True)
+
+
+@pytest.mark.skipif(not xbt.LZO_AVAILABLE, reason='python-lzo is not installed')
+def test_compressed_round_trip(tmp_path):
+    import lzo
+
+    pixels = bytes(4096)
+    bundle = tmp_path / 'Textures.xbt'
+    xbt.write_xbt(bundle, {'a.png': (32, 32, pixels), 'b.png': (1, 1, bytes(range(4)))},
+                  compress=lambda name: name == 'a.png')
+    index = xbt.read_xbt(bundle)
+    (frame,) = index['a.png'].frames
+    assert frame.is_packed
+    data = bundle.read_bytes()[frame.offset:frame.offset + frame.packed_size]
+    assert lzo.decompress(data, False, frame.unpacked_size) == pixels
+    assert not index['b.png'].frames[0].is_packed